@@ -1,6 +1,8 @@
 import os
 import time
 import queue
+# latest_frame.py is in the repository root, run this script from there: PYTHONPATH=. python3 0_not_working/Code_1_Arda.py
+from latest_frame import LatestFrame
 import random
 import threading
 import cv2
@@ -39,8 +41,8 @@ nao = Nao(ip=nao_ip)
 nao.motion.request(NaoPostureRequest("Stand", 0.5))
 
 # Initialize buffers for images and face detection
-imgs_buffer = queue.Queue(maxsize=1)
-faces_buffer = queue.Queue(maxsize=1)
+imgs_buffer = LatestFrame()
+faces_buffer = LatestFrame()
 
 
 # Callback functions for receiving image and face detection data
@@ -1,6 +1,8 @@
 import os 
 import time
 import queue
+# latest_frame.py is in the repository root, run this script from there: PYTHONPATH=. python3 0_not_working/Code_3.py
+from latest_frame import LatestFrame
 import random
 import threading
 import cv2
@@ -15,7 +17,7 @@ from sic_framework.services.openai_gpt.gpt import GPT, GPTConf, GPTRequest, Open
 from sic_framework.devices.common_naoqi.naoqi_text_to_speech import (
     NaoqiTextToSpeechRequest,
 )
-from sic_framework.services.face_detection.face_detection import FaceDetection
+from gaze_detection.attention_detection import AttentionDetection, AttentionMessage
 from sic_framework.core.message_python2 import (
     BoundingBoxesMessage,
     CompressedImageMessage,
@@ -38,23 +40,24 @@ nao = Nao(ip=nao_ip)
 
 nao.motion.request(NaoPostureRequest("Stand", 0.5))
 
-# Initialize buffers for images and face detection
-imgs_buffer = queue.Queue(maxsize=1)
-faces_buffer = queue.Queue(maxsize=1)
+# Initialize buffers for images and the faces and eyes found on them
+imgs_buffer = LatestFrame()
+attention_buffer = LatestFrame()
 
-# Callback functions for receiving image and face detection data
+# Callback functions for receiving image and attention data
 def on_image(image_message: CompressedImageMessage):
     imgs_buffer.put(image_message.image)
 
-def on_faces(message: BoundingBoxesMessage):
-    faces_buffer.put(message.bboxes)
+def on_attention(message: AttentionMessage):
+    attention_buffer.put(message)
 
 # Configuration for the desktop camera
 camera_conf = DesktopCameraConf(fx=1.0, fy=1.0, flip=1)
 
 # Initialize devices and services
 desktop = Desktop(camera_conf=camera_conf)
-face_rec = FaceDetection()
+# faces and eyes in one component, every frame is sent and decoded once
+attention_rec = AttentionDetection()
 whisper_conf = WhisperConf(openai_key=openai_key)
 whisper = SICWhisper(conf=whisper_conf)
 gpt_conf = GPTConf(openai_key=openai_key, model="gpt-4o-mini")
@@ -64,7 +67,7 @@ client = OpenAI(api_key=openai_key)
 
 # Connect services
 try:
-    face_rec.connect(desktop.camera)
+    attention_rec.connect(desktop.camera)
     whisper.connect(desktop.mic)
     print("Services connected successfully.")
 except Exception as e:
@@ -72,7 +75,7 @@ except Exception as e:
 
 # Register callbacks
 desktop.camera.register_callback(on_image)
-face_rec.register_callback(on_faces)
+attention_rec.register_callback(on_attention)
 
 
 # Function to change NAO's eye color
@@ -179,9 +182,9 @@ face_detected = False
 while not face_detected:
     try:
         img = imgs_buffer.get(timeout=5)
-        faces = faces_buffer.get(timeout=5)
+        attention = attention_buffer.get(timeout=5)
 
-        if faces:
+        if attention.faces:
             print("Face detected! Starting conversation...")
             face_detected = True
             welcome_message = ("Hello! I am a social robot, and today, we will time-travel together to explore the fascinating history of Amsterdam. Get ready for an immersive experience!")
@@ -530,9 +533,9 @@ face_detected = False
 while not face_detected:
     try:
         img = imgs_buffer.get(timeout=5)
-        faces = faces_buffer.get(timeout=5)
+        attention = attention_buffer.get(timeout=5)
 
-        if faces:
+        if attention.faces:
             print("Face detected! Starting conversation...")
             face_detected = True
             welcome_message = "Hello! I am a social robot, and today, we will time-travel together to explore the fascinating history of Amsterdam. Get ready for an immersive experience!"
@@ -1,6 +1,9 @@
 import os 
 import time
 import queue
+# latest_frame.py is in the repository root, run this script from there:
+# PYTHONPATH=. python3 0_not_working/Code_3_improvement_attempt.py
+from latest_frame import LatestFrame
 import random
 import threading
 import cv2
@@ -79,8 +82,8 @@ class NAOInteractionManager:
             self.initialize_services()
             
             # Initialize buffers and event management
-            self.imgs_buffer = queue.Queue(maxsize=1)
-            self.faces_buffer = queue.Queue(maxsize=1)
+            self.imgs_buffer = LatestFrame()
+            self.faces_buffer = LatestFrame()
             self.interrupted = threading.Event()
             
             # Register callbacks
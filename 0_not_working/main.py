@@ -7,7 +7,8 @@ from interaction.speech_to_text import SpeechToText
 from control.motion import Motion
 from control.leds import LEDControl
 import os
-import queue
+# latest_frame.py is in the repository root, which has to be on the path: cd 0_not_working && PYTHONPATH=.. python3 main.py
+from latest_frame import LatestFrame
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -29,8 +30,8 @@ camera = Camera()
 face_rec = FaceDetectionService()
 
 # Buffers for image and face detection callbacks
-imgs_buffer = queue.Queue(maxsize=1)
-faces_buffer = queue.Queue(maxsize=1)
+imgs_buffer = LatestFrame()
+faces_buffer = LatestFrame()
 
 # Register callbacks for camera and face detection
 camera.register_callback(lambda img: imgs_buffer.put(img))
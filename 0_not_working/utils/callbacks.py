@@ -1,13 +1,14 @@
 # callbacks.py: Handles image and face detection callbacks.
-import queue
+# latest_frame.py is in the repository root, which has to be on PYTHONPATH
+from latest_frame import LatestFrame
 from sic_framework.core.message_python2 import (
     BoundingBoxesMessage,
     CompressedImageMessage,
 )
 
 # Initialize buffers for images and face detection
-imgs_buffer = queue.Queue(maxsize=1)
-faces_buffer = queue.Queue(maxsize=1)
+imgs_buffer = LatestFrame()
+faces_buffer = LatestFrame()
 
 
 def on_image(image_message: CompressedImageMessage):
@@ -6,11 +6,14 @@ import random
 
 
 class HistoricalRoles:
-    def __init__(self):
+    def __init__(self, roles=None):
         """
         Initialize the HistoricalRoles class.
+
+        :param roles: Optional dictionary of roles by era, e.g. the roles of a catalog shared by several sessions.
+                      The roles are only read, every instance keeps track of its own chosen eras.
         """
-        self.roles = self._load_roles()
+        self.roles = roles if roles is not None else self._load_roles()
         self.previous_eras = []  # List to store previously chosen eras
         self.current_role = None  # Store the current role
 
@@ -0,0 +1,75 @@
+"""
+Compares the separate face and eye detection components, which both receive and decode every camera
+frame, with the fused attention detection, which receives and decodes it once and searches the eyes
+inside the faces it found.
+
+Every camera message is serialized once, as the camera does, and deserialized once per component that
+is connected to the camera.
+
+To run this file:
+PYTHONPATH=. python3 benchmarks/benchmark_attention_detection.py --frames 100
+"""
+
+import argparse
+import time
+
+import cv2
+
+from benchmarks.frames import SyntheticFrames
+from benchmarks.stats import format_latencies
+from gaze_detection.attention_detection import AttentionDetectionConf, attention_message
+from gaze_detection.eye_detection import EyeDetectionConf, EyeDetector
+from sic_framework.core.message_python2 import CompressedImageMessage, SICMessage
+
+
+def separate(face_cascade, eye_detector):
+    def call(payload):
+        # the face detection component
+        image = SICMessage.deserialize(payload).image
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(60, 60))
+        # the eye detection component
+        image = SICMessage.deserialize(payload).image
+        eyes = eye_detector.detect(image)
+        return faces, eyes
+
+    return call
+
+
+def fused(detector):
+    def call(payload):
+        image = SICMessage.deserialize(payload).image
+        return attention_message(detector.detect(image))
+
+    return call
+
+
+def measure(call, payloads):
+    call(payloads[0])
+    latencies = []
+    for payload in payloads:
+        started_at = time.perf_counter()
+        call(payload)
+        latencies.append(time.perf_counter() - started_at)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    frames = SyntheticFrames(args.width, args.height).frames(args.frames)
+    payloads = [CompressedImageMessage(image).serialize() for image, _ in frames]
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+    print(f"{args.frames} frames of {args.width}x{args.height}")
+    print(format_latencies("separate face and eye", measure(separate(face_cascade, EyeDetector(EyeDetectionConf())),
+                                                            payloads)))
+    print(format_latencies("fused attention", measure(fused(EyeDetector(AttentionDetectionConf())), payloads)))
+
+
+if __name__ == "__main__":
+    main()
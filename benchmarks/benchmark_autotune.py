@@ -0,0 +1,43 @@
+"""
+Runs the scaling auto-tuner of gaze_detection/autotune.py on a synthetic calibration clip of a visitor who
+drifts through the image and now and then looks away, and reports the speed-up of the chosen frame scale
+and cascade scaleFactor over full resolution frames.
+
+To run this file:
+PYTHONPATH=. python3 benchmarks/benchmark_autotune.py --frames 120 --target 0.95
+"""
+
+import argparse
+
+from benchmarks.frames import moving_face_video
+from gaze_detection.autotune import tune
+from gaze_detection.eye_detection import EyeDetectionConf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--face-size", type=int, default=240, help="face height in pixels of the full frame")
+    parser.add_argument("--target", type=float, default=0.95)
+    parser.add_argument("--face-roi", action="store_true", help="search the eyes inside the faces only")
+    args = parser.parse_args()
+
+    video = moving_face_video(args.frames, width=args.width, height=args.height, size=args.face_size,
+                              look_away_every=30, look_away_frames=10)
+    clip = [image for image, _ in video]
+    labels = [looking for _, looking in video]
+    best, choices = tune(clip, labels=labels, target_rate=args.target, conf=EyeDetectionConf(face_roi=args.face_roi))
+
+    print(f"{args.frames} frames of {args.width}x{args.height}, target detection rate {args.target}")
+    print(f"{'fx':>6} {'scaleFactor':>12} {'rate':>6} {'ms/frame':>9} {'speedup':>8}")
+    for choice in choices:
+        marker = "  <- chosen" if choice is best else ""
+        print(f"{choice.fx:>6g} {choice.scale_factor:>12g} {choice.detection_rate:>6.3f} "
+              f"{choice.time_per_frame * 1000:>9.1f} {choice.speedup:>7.1f}x{marker}")
+    print(f"\nBest: {best}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Compares the detector backends of EyeDetectionConf on the same images.
+
+Reported per backend are frames per second, the p50/p95 latency of a frame and, against the labelled
+eye positions, recall (share of the eyes found) and precision (share of the detections that are an eye).
+Backends whose model file is missing are skipped, gaze_detection/fetch_models.py downloads them.
+
+The images are synthetic frames with cartoon faces by default, the face models are trained on real
+faces, so compare the backends on real images. A directory of them can be used instead, with a
+labels.json mapping every file name to the [x, y] centers of its eyes, e.g.
+data/gaze_images/labels.json: {"visitor_01.jpg": [[212, 240], [286, 238]], "away_01.jpg": []}
+A few dozen photos taken with the robot's camera, with and without a visitor looking at it, are enough.
+
+To run this file:
+PYTHONPATH=. python3 -m gaze_detection.fetch_models
+PYTHONPATH=. python3 benchmarks/benchmark_backends.py
+PYTHONPATH=. python3 benchmarks/benchmark_backends.py --images data/gaze_images --backends haar dnn landmarks
+"""
+
+import argparse
+import json
+import os
+import time
+
+import cv2
+
+from benchmarks.benchmark_eye_detection import contains
+from benchmarks.frames import SyntheticFrames
+from benchmarks.stats import percentile
+from gaze_detection.backends import BACKENDS
+from gaze_detection.eye_detection import EyeDetectionConf, EyeDetector
+
+
+def load_images(directory):
+    """
+    :return: List of (RGB image, eye centers) of the labelled images in a directory.
+    """
+    with open(os.path.join(directory, "labels.json")) as file:
+        labels = json.load(file)
+    images = []
+    for name, eyes in sorted(labels.items()):
+        image = cv2.imread(os.path.join(directory, name))
+        if image is None:
+            print(f"Error reading {name}, skipped")
+            continue
+        images.append((cv2.cvtColor(image, cv2.COLOR_BGR2RGB), [tuple(eye) for eye in eyes]))
+    return images
+
+
+def evaluate(detector, images):
+    latencies = []
+    found = true_eyes = detections = correct = 0
+    for image, eyes in images:
+        started_at = time.perf_counter()
+        result = detector.detect(image)
+        latencies.append(time.perf_counter() - started_at)
+        true_eyes += len(eyes)
+        found += sum(any(contains(bbox, eye) for bbox in result.bboxes) for eye in eyes)
+        detections += result.count
+        correct += sum(any(contains(bbox, eye) for eye in eyes) for bbox in result.bboxes)
+    return {
+        "fps": len(images) / sum(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "recall": found / max(1, true_eyes),
+        "precision": correct / max(1, detections),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--images", help="directory with images and a labels.json, synthetic frames if not given")
+    parser.add_argument("--frames", type=int, default=100, help="number of synthetic frames")
+    parser.add_argument("--face-model", help="model file of the lbp, dnn or landmarks backend")
+    args = parser.parse_args()
+
+    images = load_images(args.images) if args.images else SyntheticFrames().frames(args.frames)
+    configurations = []
+    for backend in args.backends:
+        configurations.append((backend, EyeDetectionConf(backend=backend, face_model=args.face_model)))
+        if backend == "haar":
+            configurations.append(("haar, face roi", EyeDetectionConf(backend=backend, face_roi=True)))
+
+    print(f"{len(images)} images from {args.images or 'synthetic frames'}")
+    print(f"{'backend':<16} {'frames/s':>9} {'p50':>9} {'p95':>9} {'recall':>7} {'precision':>10}")
+    for name, conf in configurations:
+        try:
+            detector = EyeDetector(conf)
+        except (FileNotFoundError, cv2.error) as e:
+            print(f"{name:<16} skipped: {e}")
+            continue
+        stats = evaluate(detector, images)
+        print(f"{name:<16} {stats['fps']:>9.1f} {stats['p50'] * 1000:>7.1f}ms {stats['p95'] * 1000:>7.1f}ms "
+              f"{stats['recall']:>7.2f} {stats['precision']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares the full-frame eye scan of the gaze detection with the two-stage scan that first finds the
+faces at a reduced resolution and then only searches the eyes inside them.
+
+Reported are frames per second and, against the known eye positions of synthetic frames:
+- recall: share of the eyes that were found
+- precision: share of the detections that are an eye
+- gaze accuracy: share of the frames where "at least two eyes" is answered correctly
+
+To run this file:
+PYTHONPATH=. python3 benchmarks/benchmark_eye_detection.py --frames 200
+"""
+
+import argparse
+import time
+
+from benchmarks.frames import SyntheticFrames
+from gaze_detection.eye_detection import EyeDetectionConf, EyeDetector
+
+
+def contains(bbox, point):
+    x, y = point
+    return bbox.x <= x <= bbox.x + bbox.w and bbox.y <= y <= bbox.y + bbox.h
+
+
+def evaluate(detector, frames, min_eyes=None):
+    found = true_eyes = detections = correct = gaze_correct = 0
+    started_at = time.perf_counter()
+    results = [detector.detect(image, min_eyes=min_eyes) for image, _ in frames]
+    duration = time.perf_counter() - started_at
+    for result, (_, eyes) in zip(results, frames):
+        true_eyes += len(eyes)
+        found += sum(any(contains(bbox, eye) for bbox in result.bboxes) for eye in eyes)
+        detections += result.count
+        correct += sum(any(contains(bbox, eye) for eye in eyes) for bbox in result.bboxes)
+        gaze_correct += result.eyes_on_image == (len(eyes) >= 2)
+    return {
+        "fps": len(frames) / duration,
+        "recall": found / max(1, true_eyes),
+        "precision": correct / max(1, detections),
+        "gaze_accuracy": gaze_correct / len(frames),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--face-scale", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    frames = SyntheticFrames(args.width, args.height, seed=args.seed).frames(args.frames)
+    modes = [
+        ("full frame", EyeDetectionConf(), None),
+        ("full frame, early exit", EyeDetectionConf(), 2),
+        ("face roi", EyeDetectionConf(face_roi=True, face_scale=args.face_scale), None),
+        ("face roi, early exit", EyeDetectionConf(face_roi=True, face_scale=args.face_scale), 2),
+    ]
+
+    print(f"{args.frames} frames of {args.width}x{args.height}")
+    print(f"{'mode':<24} {'frames/s':>9} {'recall':>7} {'precision':>10} {'gaze accuracy':>14}")
+    for name, conf, min_eyes in modes:
+        stats = evaluate(EyeDetector(conf), frames, min_eyes)
+        print(f"{name:<24} {stats['fps']:>9.1f} {stats['recall']:>7.2f} {stats['precision']:>10.2f} "
+              f"{stats['gaze_accuracy']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares the per-frame round trip of an eye detection request through the SIC framework, with the
+component in its own process, with the component created in process by EyeDetection(in_process=True),
+and with calling the EyeDetector directly.
+
+The direct call, the in-process connector and the serialization of the request and the reply run
+without redis; the serialization is the part of the overhead that does not depend on the broker. For
+the process mode redis and the component manager have to be running:
+1. redis-server conf/redis/redis.conf
+2. PYTHONPATH=. python3 gaze_detection/eye_detection.py
+
+To run this file:
+PYTHONPATH=. python3 benchmarks/benchmark_eye_detection_transport.py --frames 100
+"""
+
+import argparse
+import time
+
+from benchmarks.frames import SyntheticFrames
+from benchmarks.stats import format_latencies
+from gaze_detection.eye_detection import (
+    EyeDetection,
+    EyeDetectionConf,
+    EyeDetectionRequest,
+    EyeDetectionResult,
+    EyeDetector,
+)
+from sic_framework.core.message_python2 import SICMessage
+
+
+def round_trips(call, images):
+    # the first call loads the cascades and allocates the buffers
+    call(images[0])
+    latencies = []
+    for image in images:
+        started_at = time.perf_counter()
+        call(image)
+        latencies.append(time.perf_counter() - started_at)
+    return latencies
+
+
+def serialized(detector, detect=True):
+    """
+    :param detect: False to measure only the serialization, with the same reply for every frame.
+    """
+    reply = EyeDetectionResult([])
+
+    def call(image):
+        request = SICMessage.deserialize(EyeDetectionRequest(image).serialize())
+        result = detector.detect(request.image, min_eyes=request.min_eyes) if detect else reply
+        return SICMessage.deserialize(result.serialize())
+
+    return call
+
+
+def connector(in_process, conf):
+    eye_detection = EyeDetection(conf=conf, in_process=in_process)
+    return eye_detection, lambda image: eye_detection.request(EyeDetectionRequest(image))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--face-roi", action="store_true", help="search the eyes inside the faces only")
+    args = parser.parse_args()
+
+    images = [image for image, _ in SyntheticFrames(args.width, args.height).frames(args.frames)]
+    conf = EyeDetectionConf(face_roi=args.face_roi)
+    detector = EyeDetector(conf)
+    print(f"{args.frames} frames of {args.width}x{args.height}")
+    print(format_latencies("direct EyeDetector", round_trips(detector.detect, images)))
+    print(format_latencies("serialization only", round_trips(serialized(detector, detect=False), images)))
+    print(format_latencies("serialize, detect, serialize", round_trips(serialized(detector), images)))
+
+    for name, in_process in (("in process", True), ("component process", False)):
+        try:
+            eye_detection, call = connector(in_process, conf)
+        except Exception as e:
+            print(f"{name:<30} skipped: {e}".splitlines()[0])
+            continue
+        try:
+            print(format_latencies(name, round_trips(call, images)))
+        finally:
+            eye_detection.stop()
+
+
+if __name__ == "__main__":
+    main()
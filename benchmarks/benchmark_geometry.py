@@ -0,0 +1,73 @@
+"""
+Compares matching every eye against every face with nested Python loops, as the demo used to, with the
+vectorized NumPy matching of gaze_detection.geometry, for crowds of increasing size.
+
+To run this file:
+PYTHONPATH=. python3 benchmarks/benchmark_geometry.py --faces 10 50 200 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from gaze_detection.geometry import assign_eyes, containment
+from sic_framework.core.message_python2 import BoundingBox
+
+
+def crowd(faces, rng, width=1920, height=1080):
+    """
+    :return: Random faces with two eyes each, and as many stray eyes on the background.
+    """
+    face_boxes, eye_boxes = [], []
+    for _ in range(faces):
+        size = int(rng.integers(30, 200))
+        x, y = int(rng.integers(0, width - size)), int(rng.integers(0, height - size))
+        face_boxes.append(BoundingBox(x, y, size, size))
+        for side in (0, 1):
+            eye_boxes.append(BoundingBox(x + size // 8 + side * size // 2, y + size // 4, size // 4, size // 4))
+    for _ in range(faces):
+        eye_boxes.append(BoundingBox(int(rng.integers(0, width - 20)), int(rng.integers(0, height - 20)), 20, 20))
+    return face_boxes, eye_boxes
+
+
+def nested_loops(faces, eyes):
+    inside = []
+    for face in faces:
+        for eye in eyes:
+            if (face.x <= eye.x <= face.x + face.w
+                    and face.y <= eye.y <= face.y + face.h
+                    and face.x <= eye.x + eye.w <= face.x + face.w
+                    and face.y <= eye.y + eye.h <= face.y + face.h):
+                inside.append(True)
+            else:
+                inside.append(False)
+    return np.array(inside, dtype=bool).reshape(len(faces), len(eyes))
+
+
+def timed(function, repeat, *args):
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return (time.perf_counter() - started_at) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faces", type=int, nargs="+", default=[10, 50, 200, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'faces':>6} {'eyes':>6} {'loops ms':>10} {'numpy ms':>10} {'speed-up':>9} {'assign ms':>10}  equal")
+    for count in args.faces:
+        faces, eyes = crowd(count, rng)
+        loop_time, expected = timed(nested_loops, args.repeat, faces, eyes)
+        numpy_time, inside = timed(containment, args.repeat, faces, eyes)
+        assign_time, _ = timed(assign_eyes, args.repeat, faces, eyes)
+        print(f"{count:>6} {len(eyes):>6} {loop_time * 1000:>10.2f} {numpy_time * 1000:>10.2f} "
+              f"{loop_time / numpy_time:>8.1f}x {assign_time * 1000:>10.2f}  {np.array_equal(expected, inside)}")
+
+
+if __name__ == "__main__":
+    main()
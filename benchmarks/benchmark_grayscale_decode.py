@@ -0,0 +1,88 @@
+"""
+Measures the time and the memory allocated per frame to get the grayscale image the eye cascade runs on.
+
+- array + astype: the previous conversion, array(image).astype(np.uint8) and cv2.cvtColor
+- reused buffer: EyeDetector.grayscale on an RGB frame, converting into a preallocated buffer
+- jpeg, rgb decode: decoding a compressed frame to RGB and converting it, as SIC does before the detection
+- jpeg, gray decode 1/n: EyeDetector.grayscale on the JPEG bytes, decoding straight to a smaller grayscale image
+
+Only the reused buffer applies to the live camera: SIC decodes the JPEG of a CompressedImageMessage to RGB
+while deserializing it, so the detection never gets the compressed bytes of those frames.
+
+To run this file:
+PYTHONPATH=. python3 benchmarks/benchmark_grayscale_decode.py
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from numpy import array
+
+from benchmarks.frames import SyntheticFrames
+from gaze_detection.eye_detection import EyeDetectionConf, EyeDetector
+
+
+def measure(convert, frames, repeat):
+    """
+    :return: Milliseconds and kilobytes allocated per frame.
+    """
+    for frame in frames[:5]:
+        convert(frame)
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            convert(frame)
+    duration = (time.perf_counter() - started_at) / (repeat * len(frames))
+
+    # peak minus the memory in use before, so buffers that are freed right away are counted too
+    tracemalloc.start()
+    allocated = 0
+    for frame in frames:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        convert(frame)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return duration * 1000, allocated / len(frames) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args()
+
+    rgb_frames = [image for image, _ in SyntheticFrames(args.width, args.height).frames(args.frames)]
+    jpeg_frames = [cv2.imencode(".jpg", image)[1].tobytes() for image in rgb_frames]
+
+    def array_astype(image):
+        return cv2.cvtColor(array(image).astype(np.uint8), cv2.COLOR_RGB2GRAY)
+
+    def rgb_decode(data):
+        rgb = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return array_astype(rgb)
+
+    detector = EyeDetector()
+    cases = [
+        ("array + astype", array_astype, rgb_frames),
+        ("reused buffer", detector.grayscale, rgb_frames),
+        ("jpeg, rgb decode", rgb_decode, jpeg_frames),
+    ]
+    for reduction in (1, 2, 4):
+        decoder = EyeDetector(EyeDetectionConf(jpeg_reduction=reduction))
+        cases.append((f"jpeg, gray decode 1/{reduction}", decoder.grayscale, jpeg_frames))
+
+    print(f"{args.frames} frames of {args.width}x{args.height}")
+    print(f"{'conversion':<22} {'ms/frame':>9} {'KB allocated/frame':>19}")
+    for name, convert, frames in cases:
+        milliseconds, kilobytes = measure(convert, frames, args.repeat)
+        print(f"{name:<22} {milliseconds:>9.2f} {kilobytes:>19.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measures the throughput of the eye detection on wide, high resolution frames with several visitors,
+for 1 to N worker processes.
+
+- frames: every frame goes to one worker, several frames are detected at the same time
+- tiles: every frame is split into vertical strips that are detected in parallel
+
+Reported are frames per second, the mean latency of a frame and the speedup over a single process.
+
+To run this file:
+PYTHONPATH=. python3 benchmarks/benchmark_parallel_detection.py --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks.frames import SyntheticFrames
+from gaze_detection.eye_detection import EyeDetectionConf, EyeDetector
+from gaze_detection.parallel_detection import FRAMES, TILES, ParallelEyeDetector
+
+
+def run_pool(frames, conf, workers, mode):
+    detector = ParallelEyeDetector(conf, workers=workers, mode=mode)
+    # the first frames start the workers and load their cascades
+    for future in [detector.submit(image) for image in frames[:workers]]:
+        future.result()
+
+    started_at = time.perf_counter()
+    if mode == FRAMES:
+        results = [future.result() for future in [detector.submit(image) for image in frames]]
+    else:
+        results = [detector.detect(image) for image in frames]
+    duration = time.perf_counter() - started_at
+    detector.close()
+    latency = sum(result.processing_time for result in results) / len(results)
+    return len(frames) / duration, latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="default: 1, 2, 4, ... up to the cores")
+    parser.add_argument("--frames", type=int, default=40)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--faces", type=int, default=5, help="maximum number of visitors per frame")
+    parser.add_argument("--face-roi", action="store_true", help="search the eyes inside the faces only")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({2 ** power for power in range(cores.bit_length())} | {cores})
+    conf = EyeDetectionConf(face_roi=args.face_roi)
+    frames = [image for image, _ in SyntheticFrames(args.width, args.height, max_faces=args.faces,
+                                                    max_face=400).frames(args.frames)]
+
+    detector = EyeDetector(conf)
+    started_at = time.perf_counter()
+    for image in frames:
+        detector.detect(image)
+    single = len(frames) / (time.perf_counter() - started_at)
+
+    print(f"{args.frames} frames of {args.width}x{args.height}, {cores} cores")
+    print(f"{'mode':<8} {'workers':>7} {'frames/s':>9} {'latency':>10} {'speedup':>8}")
+    print(f"{'inline':<8} {1:>7} {single:>9.1f} {1000 / single:>8.1f}ms {1.0:>8.2f}")
+    for mode in (FRAMES, TILES):
+        for count in workers:
+            fps, latency = run_pool(frames, conf, count, mode)
+            print(f"{mode:<8} {count:>7} {fps:>9.1f} {latency * 1000:>8.1f}ms {fps / single:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
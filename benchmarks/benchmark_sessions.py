@@ -0,0 +1,75 @@
+"""
+Measures how the throughput of one process scales with the number of concurrent sessions,
+each driving a simulated NAO against a shared local OpenAI-compatible server.
+
+For every number of sessions the benchmark reports the turns and sentences completed per second
+and the p50/p95 of transcript to first speech, which should stay flat while the sessions scale.
+
+To run this file:
+PYTHONPATH=. python3 benchmarks/benchmark_sessions.py --sessions 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+import nltk
+
+from HistoricalRoles import HistoricalRoles
+from benchmarks.benchmark_turn_latency import transcript_to_first_speech
+from benchmarks.fakes import FakeNao, FakeOpenAIServer, FakeWhisper
+from benchmarks.stats import percentile
+from interaction.openai_client import OpenAIClientFactory
+from interaction.session import Session, SharedServices, run_sessions
+
+
+def run(count, args, client, historical_roles):
+    services = SharedServices(client, historical_roles, whisper_factory=lambda: FakeWhisper(delay=args.stt_delay))
+    robots = [FakeNao(characters_per_second=args.speech_rate, animation_duration=0.3) for _ in range(count)]
+    sessions = [Session(nao, services, register_touch=False) for nao in robots]
+
+    started_at = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(run_sessions(sessions, args.eras, talks_per_era=args.talks_per_era))
+    duration = time.perf_counter() - started_at
+
+    turns = sum(len(session.whisper.returned_at) for session in sessions)
+    sentences = sum(len(nao.tts.log) for nao in robots)
+    latencies = []
+    for session, nao in zip(sessions, robots):
+        latencies += transcript_to_first_speech(session.whisper.returned_at, nao.tts.log)
+    return duration, turns, sentences, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--eras", type=int, default=2)
+    parser.add_argument("--talks-per-era", type=int, default=2)
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.4)
+    parser.add_argument("--stt-delay", type=float, default=0.5)
+    parser.add_argument("--speech-rate", type=float, default=60.0)
+    args = parser.parse_args()
+
+    nltk.download('punkt_tab', quiet=True)
+
+    server = FakeOpenAIServer(tokens_per_second=args.tokens_per_second,
+                              first_token_delay=args.first_token_delay).start()
+    client = OpenAIClientFactory(api_key="benchmark", base_url=server.base_url, max_connections=100).client
+    # loaded once, every session only reads it
+    historical_roles = HistoricalRoles()
+
+    print(f"{'sessions':>8} {'duration':>9} {'turns/s':>8} {'sentences/s':>12} {'first speech p50':>17} {'p95':>8}")
+    for count in args.sessions:
+        duration, turns, sentences, latencies = run(count, args, client, historical_roles)
+        p50, p95 = (percentile(latencies, q) for q in (50, 95))
+        print(f"{count:>8} {duration:>8.1f}s {turns / duration:>8.2f} {sentences / duration:>12.2f} "
+              f"{(p50 or 0) * 1000:>15.1f}ms {(p95 or 0) * 1000:>6.1f}ms")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compares running the eye cascade on every frame with tracking the eyes between keyframes, on a
+synthetic video of a visitor who drifts through the image and now and then looks away.
+
+Reported are the average cost per frame, the share of frames that needed a full detection and how
+often the "looking at the robot" answer agrees with the full detection on every frame.
+
+To run this file:
+PYTHONPATH=. python3 benchmarks/benchmark_tracking.py --frames 300
+"""
+
+import argparse
+import time
+
+from benchmarks.frames import moving_face_video
+from gaze_detection.eye_detection import EyeDetectionConf, EyeDetector
+from gaze_detection.tracking import TrackingEyeDetector
+
+
+def run(detector, video):
+    answers = []
+    started_at = time.perf_counter()
+    for frame_id, (image, _) in enumerate(video):
+        answers.append(detector.detect(image, frame_id=frame_id).eyes_on_image)
+    return (time.perf_counter() - started_at) / len(video), answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--speed", type=float, default=2.0, help="pixels the visitor moves per frame")
+    parser.add_argument("--keyframe-interval", type=int, nargs="+", default=[5, 15, 30])
+    parser.add_argument("--face-roi", action="store_true", help="search the eyes inside the faces only")
+    args = parser.parse_args()
+
+    video = moving_face_video(args.frames, speed=args.speed)
+    conf = EyeDetectionConf(face_roi=args.face_roi)
+    full_cost, full_answers = run(EyeDetector(conf), video)
+    truth = [looking for _, looking in video]
+
+    def agreement(answers, reference):
+        return sum(a == b for a, b in zip(answers, reference)) / len(reference)
+
+    print(f"{args.frames} frames, visitor moving {args.speed} px/frame")
+    print(f"{'mode':<22} {'ms/frame':>9} {'keyframes':>10} {'agreement':>10} {'vs truth':>9}")
+    print(f"{'full detection':<22} {full_cost * 1000:>9.2f} {1.0:>10.2f} {1.0:>10.2f} "
+          f"{agreement(full_answers, truth):>9.2f}")
+    for interval in args.keyframe_interval:
+        tracker = TrackingEyeDetector(EyeDetector(conf), keyframe_interval=interval)
+        cost, answers = run(tracker, video)
+        print(f"{f'tracking, every {interval}':<22} {cost * 1000:>9.2f} {tracker.keyframes / len(video):>10.2f} "
+              f"{agreement(answers, full_answers):>10.2f} {agreement(answers, truth):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Measures the latency of the conversation turn loop of main_button.py and main_gaze_detection.py
+against a simulated NAO, a simulated Whisper service and a local OpenAI-compatible server.
+
+Reported are p50/p95/p99 of:
+- transcript to first speech: the visitor finished talking until NAO starts the next sentence
+- inter-sentence gap: silence between two sentences of the same reply
+- interrupt to silence: head touch (button mode) or the gaze tracker reporting lost attention
+  (gaze mode) until NAO stops the story
+
+To run this file:
+PYTHONPATH=. python3 benchmarks/benchmark_turn_latency.py --mode button
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+import nltk
+
+from HistoricalRoles import HistoricalRoles
+from benchmarks.fakes import FakeCamera, FakeNao, FakeOpenAIServer, FakeWhisper
+from benchmarks.stats import format_latencies
+from gaze_detection.gaze_tracker import GazeTracker
+from interaction.conversation import INTERRUPT_RESPONSE, Conversation
+from interaction.openai_client import OpenAIClientFactory
+from interaction.orchestrator import ConversationOrchestrator
+from tracing import tracer
+
+
+def transcript_to_first_speech(transcripts_at, tts_log):
+    latencies = []
+    for transcript_at in transcripts_at:
+        starts = [started_at for started_at, _, _ in tts_log if started_at >= transcript_at]
+        if starts:
+            latencies.append(min(starts) - transcript_at)
+    return latencies
+
+
+def interrupt_to_silence(interrupts_at, tts_log):
+    latencies = []
+    for interrupt_at in interrupts_at:
+        ends = [ended_at for started_at, ended_at, text in tts_log
+                if text != INTERRUPT_RESPONSE and started_at <= interrupt_at]
+        latencies.append(max(0.0, max(ends, default=interrupt_at) - interrupt_at))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["button", "gaze"], default="button")
+    parser.add_argument("--eras", type=int, default=4, help="number of eras to visit")
+    parser.add_argument("--talks-per-era", type=int, default=3)
+    parser.add_argument("--blocking", action="store_true", help="use the blocking turn loop instead of the orchestrator")
+    parser.add_argument("--no-stream", action="store_true", help="wait for the complete reply before speaking")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.4)
+    parser.add_argument("--stt-delay", type=float, default=0.5, help="seconds the visitor takes to answer")
+    parser.add_argument("--speech-rate", type=float, default=60.0, help="characters NAO speaks per second")
+    parser.add_argument("--touch-after", type=int, default=7, help="touch the head every n-th sentence")
+    parser.add_argument("--gaze-loss", type=float, default=0.005, help="chance the visitor looks away per frame")
+    parser.add_argument("--grace-period", type=float, default=0.5, help="seconds the visitor may look away")
+    parser.add_argument("--no-warm-up", action="store_true", help="do not open the OpenAI connection up front")
+    parser.add_argument("--trace", help="write a Chrome trace of the run to this file")
+    parser.add_argument("--verbose", action="store_true", help="show what NAO says")
+    args = parser.parse_args()
+
+    nltk.download('punkt_tab', quiet=True)
+    if args.trace:
+        tracer.enable(args.trace)
+
+    server = FakeOpenAIServer(tokens_per_second=args.tokens_per_second,
+                              first_token_delay=args.first_token_delay).start()
+    openai_factory = OpenAIClientFactory(api_key="benchmark", base_url=server.base_url)
+    client = openai_factory.client
+    if not args.no_warm_up:
+        openai_factory.warm_up()
+    nao = FakeNao(characters_per_second=args.speech_rate, animation_duration=0.5,
+                  touch_after_sentences=args.touch_after if args.mode == "button" else None)
+    whisper = FakeWhisper(delay=args.stt_delay)
+
+    attention_lost_at = []
+    gaze_tracker = None
+    if args.mode == "gaze":
+        camera = FakeCamera(look_away_chance=args.gaze_loss).start()
+        gaze_tracker = GazeTracker(camera.frames, lambda frame_id, looking: looking,
+                                   grace_period=args.grace_period).start()
+        gaze_tracker.register_callback(lambda: attention_lost_at.append(time.perf_counter()))
+
+    conversation = Conversation(
+        nao,
+        whisper,
+        client,
+        HistoricalRoles(),
+        stream_replies=not args.no_stream,
+        # checked between sentences, the orchestrator is also called back the moment the visitor looks away
+        attention_lost=gaze_tracker.attention_lost if gaze_tracker else None,
+    )
+    orchestrator = ConversationOrchestrator(conversation)
+    if gaze_tracker and not args.blocking:
+        gaze_tracker.register_callback(orchestrator.visitor_looked_away)
+    if args.mode == "button":
+        nao.buttons.register_callback(conversation.touch_stop if args.blocking else orchestrator.touch_stop)
+
+    started_at = time.perf_counter()
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        if args.blocking:
+            conversation.run(args.eras, talks_per_era=args.talks_per_era)
+        else:
+            asyncio.run(orchestrator.run(args.eras, talks_per_era=args.talks_per_era))
+        conversation.close()
+    duration = time.perf_counter() - started_at
+    if gaze_tracker:
+        gaze_tracker.close()
+        camera.stop()
+    server.stop()
+
+    interrupts_at = nao.buttons.touched_at if args.mode == "button" else attention_lost_at
+    print(f"mode={args.mode} blocking={args.blocking} streaming={not args.no_stream} eras={args.eras} duration={duration:.1f}s "
+          f"llm_requests={server.requests}")
+    print(format_latencies("transcript to first speech", transcript_to_first_speech(whisper.returned_at, nao.tts.log)))
+    print(format_latencies("inter-sentence gap", list(conversation.speech.gaps)))
+    print(format_latencies("interrupt to silence", interrupt_to_silence(interrupts_at, nao.tts.log)))
+    print(f"openai connections: {openai_factory.metrics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Local stand-ins for the NAO, the Whisper service and the OpenAI API, so the conversation
+can be benchmarked without a robot or network access.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from latest_frame import LatestFrame
+
+DEFAULT_REPLIES = [
+    "Ah, welcome traveller! The harbour is full of ships today. Merchants shout prices from every quay. "
+    "I just bought a barrel of herring for a fair price. What would you trade if you lived here?",
+    "The canals are being dug as we speak. Every week a new warehouse rises along the water. "
+    "The city smells of tar, fish and fresh bread. Would you like to walk along the Herengracht with me?",
+]
+DEFAULT_TRANSCRIPTS = [
+    "That sounds amazing, tell me more about the ships.",
+    "I would trade spices and cloth.",
+    "Yes, let's go for a walk.",
+]
+
+
+class FakeTextToSpeech:
+    def __init__(self, nao, characters_per_second):
+        self.nao = nao
+        self.characters_per_second = characters_per_second
+        self.log = []
+        self._lock = threading.Lock()
+
+    def request(self, request):
+        started_at = time.perf_counter()
+        duration = len(request.text) / self.characters_per_second
+        self.nao.on_sentence_started(duration)
+        time.sleep(duration)
+        with self._lock:
+            self.log.append((started_at, time.perf_counter(), request.text))
+
+
+class FakeMotion:
+    def __init__(self, animation_duration):
+        self.animation_duration = animation_duration
+        self.requests = 0
+
+    def request(self, request):
+        self.requests += 1
+        time.sleep(self.animation_duration)
+
+
+class FakeLeds:
+    def request(self, request):
+        pass
+
+
+class FakeButtons:
+    def __init__(self):
+        self.callbacks = []
+        self.touched_at = []
+
+    def register_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def touch(self):
+        self.touched_at.append(time.perf_counter())
+        event = SimpleNamespace(value=[["Head/Touch/Front", True]])
+        for callback in self.callbacks:
+            callback(event)
+
+
+class FakeNao:
+    def __init__(self, characters_per_second=15.0, animation_duration=1.5, touch_after_sentences=None):
+        """
+        Stand-in for the Nao device with the tts, motion, leds and buttons connectors.
+
+        :param characters_per_second: Speaking rate used to simulate the duration of a sentence.
+        :param animation_duration: Duration of every animation in seconds.
+        :param touch_after_sentences: Touch the head halfway through every n-th sentence, None to never touch.
+        """
+        self.tts = FakeTextToSpeech(self, characters_per_second)
+        self.motion = FakeMotion(animation_duration)
+        self.leds = FakeLeds()
+        self.buttons = FakeButtons()
+        self.touch_after_sentences = touch_after_sentences
+        self._sentences = 0
+
+    def on_sentence_started(self, duration):
+        self._sentences += 1
+        if self.touch_after_sentences and self._sentences % self.touch_after_sentences == 0:
+            threading.Timer(duration / 2, self.buttons.touch).start()
+
+
+class FakeWhisper:
+    def __init__(self, transcripts=DEFAULT_TRANSCRIPTS, delay=1.0):
+        """
+        Stand-in for SICWhisper returning canned transcripts.
+
+        :param transcripts: Transcripts returned in turn.
+        :param delay: Seconds the simulated visitor takes to answer.
+        """
+        self.transcripts = transcripts
+        self.delay = delay
+        self.returned_at = []
+
+    def connect(self, mic):
+        pass
+
+    def request(self, request):
+        time.sleep(self.delay)
+        transcript = self.transcripts[len(self.returned_at) % len(self.transcripts)]
+        self.returned_at.append(time.perf_counter())
+        return SimpleNamespace(transcript=transcript)
+
+
+class FakeCamera:
+    def __init__(self, fps=15.0, look_away_chance=0.01, look_away_duration=2.0):
+        """
+        Stand-in for the camera and the eye detection: every frame is True while the simulated visitor
+        looks at the robot.
+
+        :param fps: Frames per second.
+        :param look_away_chance: Chance per frame that the visitor starts looking away.
+        :param look_away_duration: Seconds the visitor looks away.
+        """
+        self.fps = fps
+        self.look_away_chance = look_away_chance
+        self.look_away_duration = look_away_duration
+        self.frames = LatestFrame()
+        self.looked_away_at = []
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        frame_id = 0
+        away_until = 0.0
+        while not self._stop.wait(1.0 / self.fps):
+            now = time.perf_counter()
+            if now >= away_until and random.random() < self.look_away_chance:
+                away_until = now + self.look_away_duration
+                self.looked_away_at.append(now)
+            frame_id += 1
+            self.frames.put((frame_id, now >= away_until))
+
+
+class FakeOpenAIServer:
+    def __init__(self, replies=DEFAULT_REPLIES, tokens_per_second=40.0, first_token_delay=0.4):
+        """
+        Local OpenAI-compatible chat completions endpoint, streaming and non-streaming.
+
+        :param replies: Replies returned in turn, every word is sent as one token.
+        :param tokens_per_second: Generation speed.
+        :param first_token_delay: Seconds before the first token is sent.
+        """
+        self.replies = replies
+        self.tokens_per_second = tokens_per_second
+        self.first_token_delay = first_token_delay
+        self.requests = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def next_reply(self):
+        reply = self.replies[self.requests % len(self.replies)]
+        self.requests += 1
+        return reply
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                # models.retrieve, used to warm up the connection
+                payload = json.dumps({
+                    "id": self.path.rsplit("/", 1)[-1],
+                    "object": "model",
+                    "created": 0,
+                    "owned_by": "benchmark",
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                tokens = [word + " " for word in server.next_reply().split(" ")]
+                time.sleep(server.first_token_delay)
+                try:
+                    if body.get("stream"):
+                        self._stream(body["model"], tokens)
+                    else:
+                        time.sleep(len(tokens) / server.tokens_per_second)
+                        self._send_json(body["model"], "".join(tokens).strip())
+                except (BrokenPipeError, ConnectionResetError):
+                    # the client stopped reading, e.g. the robot was interrupted
+                    pass
+
+            def _send_json(self, model, content):
+                payload = json.dumps({
+                    "id": "chatcmpl-benchmark",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, model, tokens):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for index, token in enumerate(tokens + [None]):
+                    chunk = {
+                        "id": "chatcmpl-benchmark",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": token} if token is not None else {},
+                            "finish_reason": None if token is not None else "stop",
+                        }],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if token is not None and index < len(tokens) - 1:
+                        time.sleep(1 / server.tokens_per_second)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
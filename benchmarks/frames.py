@@ -0,0 +1,114 @@
+"""
+Synthetic camera frames with cartoon faces, so the gaze detection can be benchmarked without a camera.
+The Haar face and eye cascades of OpenCV detect these faces, and the exact position of every eye is known.
+"""
+
+import cv2
+import numpy as np
+
+
+def draw_face(image, cx, cy, size, eyes_visible=True):
+    """
+    Draw a face centered at (cx, cy) that is `size` pixels high.
+
+    :param eyes_visible: False to draw a visitor looking away, without eyes.
+    :return: The centers of both eyes.
+    """
+    half = size // 2
+    cv2.ellipse(image, (cx, cy), (int(half * 0.8), half), 0, 0, 360, (190, 160, 140), -1)
+    eyes = []
+    for side in (-1, 1):
+        if not eyes_visible:
+            break
+        ex, ey = cx + side * int(half * 0.35), cy - int(half * 0.2)
+        cv2.ellipse(image, (ex, ey - int(half * 0.17)), (int(half * 0.2), max(1, int(half * 0.04))), 0, 0, 360,
+                    (60, 40, 30), -1)
+        cv2.ellipse(image, (ex, ey), (int(half * 0.18), int(half * 0.09)), 0, 0, 360, (250, 250, 250), -1)
+        cv2.circle(image, (ex, ey), int(half * 0.08), (40, 30, 20), -1)
+        eyes.append((ex, ey))
+    cv2.ellipse(image, (cx, cy + half // 2), (int(half * 0.3), int(half * 0.08)), 0, 0, 360, (120, 60, 60), -1)
+    return eyes
+
+
+def draw_clutter(image, rng, count):
+    """
+    Draw dark blobs and stripes on the background, which look like eyes to a cascade scanning the whole frame.
+    """
+    height, width = image.shape[:2]
+    for _ in range(count):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        radius = int(rng.integers(8, 40))
+        if rng.random() < 0.5:
+            cv2.circle(image, (x, y), radius, (250, 250, 250), -1)
+            cv2.circle(image, (x, y), radius // 2, (30, 30, 30), -1)
+        else:
+            cv2.rectangle(image, (x, y), (x + 3 * radius, y + radius // 3), (40, 40, 40), -1)
+
+
+class SyntheticFrames:
+    def __init__(self, width=640, height=480, max_faces=2, min_face=90, max_face=260, clutter=6, seed=0):
+        """
+        :param width: Frame width in pixels.
+        :param height: Frame height in pixels.
+        :param max_faces: Maximum number of faces per frame, frames can also have none.
+        :param min_face: Smallest face height in pixels.
+        :param max_face: Largest face height in pixels.
+        :param clutter: Number of distracting shapes per frame.
+        :param seed: Seed of the random generator.
+        """
+        self.width = width
+        self.height = height
+        self.max_faces = max_faces
+        self.min_face = min_face
+        self.max_face = max_face
+        self.clutter = clutter
+        self.rng = np.random.default_rng(seed)
+
+    def frame(self):
+        """
+        :return: An RGB frame and the centers of the eyes on it.
+        """
+        image = np.full((self.height, self.width, 3), 90, np.uint8)
+        image += self.rng.integers(0, 20, image.shape, dtype=np.uint8)
+        draw_clutter(image, self.rng, self.clutter)
+        eyes = []
+        # faces side by side, so they do not overlap
+        faces = int(self.rng.integers(0, self.max_faces + 1))
+        for index in range(faces):
+            size = int(self.rng.integers(self.min_face, min(self.max_face, self.height - 10) + 1))
+            slot = self.width // max(1, faces)
+            cx = slot * index + slot // 2
+            cy = int(self.rng.integers(size // 2 + 5, self.height - size // 2 - 5 + 1))
+            eyes += draw_face(image, cx, cy, min(size, int(slot / 0.8) - 10))
+        return cv2.GaussianBlur(image, (5, 5), 0), eyes
+
+    def frames(self, count):
+        return [self.frame() for _ in range(count)]
+
+
+def moving_face_video(count, width=640, height=480, size=180, speed=2.0, look_away_every=60, look_away_frames=15,
+                      seed=0):
+    """
+    Frames of one visitor drifting slowly through the image, who now and then looks away.
+
+    :param count: Number of frames.
+    :param size: Face height in pixels.
+    :param speed: Pixels the face moves per frame.
+    :param look_away_every: Frames between the moments the visitor looks away.
+    :param look_away_frames: Number of frames the visitor looks away.
+    :return: List of (frame, looking) tuples.
+    """
+    rng = np.random.default_rng(seed)
+    background = np.full((height, width, 3), 90, np.uint8) + rng.integers(0, 20, (height, width, 3), dtype=np.uint8)
+    x, y = width / 2.0, height / 2.0
+    direction = rng.uniform(0, 2 * np.pi)
+    video = []
+    for index in range(count):
+        direction += rng.normal(0, 0.2)
+        x = float(np.clip(x + speed * np.cos(direction), size * 0.5, width - size * 0.5))
+        y = float(np.clip(y + speed * np.sin(direction), size * 0.6, height - size * 0.6))
+        looking = index % look_away_every >= look_away_frames or index < look_away_every
+        image = background.copy()
+        draw_face(image, int(x), int(y), size, eyes_visible=looking)
+        video.append((cv2.GaussianBlur(image, (5, 5), 0), looking))
+    return video
@@ -0,0 +1,27 @@
+def percentile(values, q):
+    """
+    Percentile with linear interpolation between the closest ranks.
+
+    :param values: The measurements.
+    :param q: The percentile, between 0 and 100.
+    :return: The percentile, or None if there are no measurements.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def format_latencies(name, values):
+    """
+    :param name: Name of the measured latency.
+    :param values: Latencies in seconds.
+    :return: A line with the number of samples and the p50/p95/p99 in milliseconds.
+    """
+    if not values:
+        return f"{name:<30} n=0"
+    p50, p95, p99 = (percentile(values, q) * 1000 for q in (50, 95, 99))
+    return f"{name:<30} n={len(values):<5} p50={p50:8.1f}ms  p95={p95:8.1f}ms  p99={p99:8.1f}ms"
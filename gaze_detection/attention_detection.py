@@ -0,0 +1,121 @@
+import time
+
+from sic_framework.core.component_manager_python2 import SICComponentManager
+from sic_framework.core.component_python2 import SICComponent
+from sic_framework.core.connector import SICConnector
+from sic_framework.core.message_python2 import (
+    CompressedImageMessage,
+    CompressedImageRequest,
+    SICMessage,
+)
+
+from gaze_detection.eye_detection import EyeDetectionConf, EyeDetector
+from gaze_detection.geometry import assign_eyes
+from tracing import enable_from_environment, tracer
+
+
+class AttentionDetectionConf(EyeDetectionConf):
+    def __init__(self, engaged_eyes=2, **kwargs):
+        """
+        The EyeDetectionConf, the faces are always searched first and the eyes inside them.
+
+        :param engaged_eyes Number of eyes a face needs for the visitor to count as looking at the robot
+        :param kwargs       The parameters of EyeDetectionConf
+        """
+        kwargs["face_roi"] = True
+        EyeDetectionConf.__init__(self, **kwargs)
+        self.engaged_eyes = engaged_eyes
+
+
+class AttentionMessage(SICMessage):
+    def __init__(self, faces, eyes, eyes_per_face, engaged, frame_id=None, timestamp=None, processing_time=0.0):
+        """
+        The faces and eyes found on one frame, so consumers no longer have to pair up separate face and
+        eye messages. The _timestamp is the one of the camera frame.
+
+        :param faces: The BoundingBox of every face.
+        :param eyes: For every face the BoundingBox of every eye inside it.
+        :param eyes_per_face: The number of eyes of every face.
+        :param engaged: True if a face has at least engaged_eyes eyes, i.e. somebody looks at the robot.
+        :param frame_id: Identifier of the frame, e.g. the timestamp of the camera message.
+        :param timestamp: Time the frame was analysed, as returned by time.time().
+        :param processing_time: Seconds spent on the detection.
+        """
+        SICMessage.__init__(self)
+        self.faces = faces
+        self.eyes = eyes
+        self.eyes_per_face = eyes_per_face
+        self.engaged = engaged
+        self.frame_id = frame_id
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.processing_time = processing_time
+
+
+def attention_message(result, engaged_eyes=2):
+    """
+    :param result: An EyeDetectionResult of a detection inside faces.
+    :return: The AttentionMessage with every eye assigned to the face it was found in.
+    """
+    faces = result.faces or []
+    eyes = [[] for _ in faces]
+    for eye, face in zip(result.bboxes, assign_eyes(faces, result.bboxes)):
+        if face >= 0:
+            eyes[face].append(eye)
+    eyes_per_face = [len(face_eyes) for face_eyes in eyes]
+    return AttentionMessage(
+        faces,
+        eyes,
+        eyes_per_face,
+        any(count >= engaged_eyes for count in eyes_per_face),
+        frame_id=result.frame_id,
+        timestamp=result.timestamp,
+        processing_time=result.processing_time,
+    )
+
+
+class AttentionDetectionComponent(SICComponent):
+    def set_config(self, new=None):
+        super(AttentionDetectionComponent, self).set_config(new)
+        # one detector for the faces and the eyes, every frame is decoded and converted to grayscale once
+        self.detector = EyeDetector(self.params)
+
+    @staticmethod
+    def get_inputs():
+        return [CompressedImageMessage, CompressedImageRequest]
+
+    @staticmethod
+    def get_conf():
+        return AttentionDetectionConf()
+
+    @staticmethod
+    def get_output():
+        return AttentionMessage
+
+    def on_message(self, message):
+        attention = self.detect(message.image, frame_id=message._timestamp)
+        attention._timestamp = message._timestamp
+        self.output_message(attention)
+
+    def on_request(self, request):
+        attention = self.detect(request.image, frame_id=request._timestamp)
+        attention._timestamp = request._timestamp
+        return attention
+
+    def detect(self, image, frame_id=None):
+        with tracer.span("attention_detection.detect"):
+            result = self.detector.detect(image, frame_id=frame_id)
+            # a plain EyeDetectionConf with face_roi=True works as well
+            return attention_message(result, getattr(self.params, "engaged_eyes", 2))
+
+
+class AttentionDetection(SICConnector):
+    component_class = AttentionDetectionComponent
+
+
+def main():
+    enable_from_environment(suffix="_attention_detection")
+    SICComponentManager([AttentionDetectionComponent])
+
+
+if __name__ == "__main__":
+    main()
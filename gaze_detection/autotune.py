@@ -0,0 +1,179 @@
+"""
+Finds how far the camera frames can be scaled down, and how coarse the cascade image pyramid can be,
+before the eye detection starts to miss eyes.
+
+The eyes only need to be about minW pixels wide, so scanning full resolution frames mostly costs time.
+The tuner runs the detection on a calibration clip for every combination of frame scale and cascade
+scaleFactor, and picks the fastest one whose answer to "are there eyes?" still agrees with the expected
+answer on at least the target share of the frames. Without labels the answers at full resolution are
+taken as the expected ones.
+
+To run this file on a recording of the camera:
+PYTHONPATH=. python3 -m gaze_detection.autotune --clip recording.mp4 --target 0.95
+"""
+
+import argparse
+import time
+
+import cv2
+
+from gaze_detection.eye_detection import EyeDetectionConf, EyeDetector
+from sic_framework.devices.common_desktop.desktop_camera import DesktopCameraConf
+
+SCALES = (1.0, 0.75, 0.5, 0.375, 0.25)
+SCALE_FACTORS = (1.05, 1.1, 1.2, 1.3)
+
+
+def scaled_conf(conf, fx):
+    """
+    :param conf: The EyeDetectionConf for full resolution frames.
+    :param fx: The scale the camera already applied to the frames.
+    :return: A copy of the configuration for frames the camera scaled by fx, with all sizes in pixels of
+        the scaled frames.
+    """
+    return EyeDetectionConf(
+        minW=max(1, int(conf.minW * fx)),
+        minH=max(1, int(conf.minH * fx)),
+        face_roi=conf.face_roi,
+        face_scale=min(1.0, conf.face_scale / fx),
+        minFaceW=max(1, int(conf.minFaceW * fx)),
+        minFaceH=max(1, int(conf.minFaceH * fx)),
+        jpeg_reduction=conf.jpeg_reduction,
+        backend=conf.backend,
+        face_model=conf.face_model,
+        scale_factor=conf.scale_factor,
+    )
+
+
+class ScalingChoice:
+    def __init__(self, fx, scale_factor, detection_rate, time_per_frame, baseline_time):
+        """
+        The outcome of one combination on the calibration clip.
+
+        :param fx: Frame scale, relative to the full resolution.
+        :param scale_factor: Cascade scaleFactor.
+        :param detection_rate: Share of the frames with the expected answer.
+        :param time_per_frame: Seconds the detection took per frame.
+        :param baseline_time: Seconds per frame at full resolution with the configured scaleFactor.
+        """
+        self.fx = fx
+        self.scale_factor = scale_factor
+        self.detection_rate = detection_rate
+        self.time_per_frame = time_per_frame
+        self.baseline_time = baseline_time
+
+    @property
+    def speedup(self):
+        return self.baseline_time / max(self.time_per_frame, 1e-9)
+
+    def camera_conf(self, flip=1):
+        """
+        :return: The DesktopCameraConf that makes the camera send frames at this scale.
+        """
+        return DesktopCameraConf(fx=self.fx, fy=self.fx, flip=flip)
+
+    def detection_conf(self, conf=None, camera_scaled=True):
+        """
+        :param conf: The EyeDetectionConf for full resolution frames, the defaults if None.
+        :param camera_scaled: True if the camera sends scaled frames, see camera_conf. False to keep the
+            camera at full resolution and let the detector scale the frames down.
+        """
+        conf = scaled_conf(conf or EyeDetectionConf(), self.fx if camera_scaled else 1.0)
+        conf.scale_factor = self.scale_factor
+        if not camera_scaled:
+            conf.scale = self.fx
+        return conf
+
+    def __repr__(self):
+        return (f"fx=fy={self.fx:g}, scaleFactor={self.scale_factor:g}: detection rate {self.detection_rate:.3f}, "
+                f"{self.time_per_frame * 1000:.1f} ms per frame, {self.speedup:.1f}x faster")
+
+
+def _run(conf, clip, min_eyes):
+    detector = EyeDetector(conf)
+    # the first detection also allocates the buffers and warms up the cascades
+    detector.detect(clip[0], min_eyes=min_eyes)
+    answers = []
+    started_at = time.perf_counter()
+    for image in clip:
+        answers.append(detector.detect(image, min_eyes=min_eyes).eyes_on_image)
+    return answers, (time.perf_counter() - started_at) / max(1, len(clip))
+
+
+def tune(clip, labels=None, target_rate=0.95, conf=None, scales=SCALES, scale_factors=SCALE_FACTORS, min_eyes=None):
+    """
+    :param clip: RGB frames at full resolution.
+    :param labels: True for every frame on which the visitor's eyes are visible, None to take the answers
+        at full resolution as labels.
+    :param target_rate: Lowest share of the frames the detection has to answer as expected.
+    :param conf: The EyeDetectionConf to tune, the defaults if None.
+    :param min_eyes: Passed on to EyeDetector.detect, 2 to tune the early exit the gaze tracker uses.
+    :return: The fastest ScalingChoice meeting the target, or the full resolution one if none does,
+        and the ScalingChoice of every combination.
+    """
+    conf = conf or EyeDetectionConf()
+    baseline, baseline_time = _run(conf, clip, min_eyes)
+    if labels is None:
+        labels = baseline
+
+    choices = []
+    for fx in scales:
+        for scale_factor in scale_factors:
+            candidate = scaled_conf(conf, 1.0)
+            candidate.scale = fx
+            candidate.scale_factor = scale_factor
+            answers, time_per_frame = _run(candidate, clip, min_eyes)
+            rate = sum(answer == label for answer, label in zip(answers, labels)) / float(max(1, len(clip)))
+            choices.append(ScalingChoice(fx, scale_factor, rate, time_per_frame, baseline_time))
+
+    passing = [choice for choice in choices if choice.detection_rate >= target_rate]
+    if not passing:
+        rate = sum(answer == label for answer, label in zip(baseline, labels)) / float(max(1, len(clip)))
+        return ScalingChoice(1.0, conf.scale_factor, rate, baseline_time, baseline_time), choices
+    return min(passing, key=lambda choice: choice.time_per_frame), choices
+
+
+def load_clip(path, limit=None):
+    """
+    :return: The frames of a video file as RGB images.
+    """
+    capture = cv2.VideoCapture(path)
+    clip = []
+    try:
+        while limit is None or len(clip) < limit:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            clip.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    finally:
+        capture.release()
+    if not clip:
+        raise ValueError(f"Could not read any frame from {path}")
+    return clip
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clip", required=True, help="video recorded with the robot's camera")
+    parser.add_argument("--frames", type=int, default=300, help="number of frames of the clip to use")
+    parser.add_argument("--target", type=float, default=0.95, help="lowest share of frames answered as expected")
+    parser.add_argument("--face-roi", action="store_true", help="search the eyes inside the faces only")
+    parser.add_argument("--early-exit", action="store_true", help="stop scanning after two eyes")
+    args = parser.parse_args()
+
+    clip = load_clip(args.clip, args.frames)
+    conf = EyeDetectionConf(face_roi=args.face_roi)
+    best, choices = tune(clip, target_rate=args.target, conf=conf, min_eyes=2 if args.early_exit else None)
+    for choice in choices:
+        print(choice)
+    print(f"\nBest: {best}")
+    camera = best.camera_conf()
+    detection = best.detection_conf(conf)
+    print(f"DesktopCameraConf(fx={camera.fx:g}, fy={camera.fy:g}, flip=1)")
+    print(f"EyeDetectionConf(minW={detection.minW}, minH={detection.minH}, face_roi={detection.face_roi}, "
+          f"face_scale={detection.face_scale:g}, minFaceW={detection.minFaceW}, minFaceH={detection.minFaceH}, "
+          f"scale_factor={detection.scale_factor:g})")
+
+
+if __name__ == "__main__":
+    main()
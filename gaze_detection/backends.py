@@ -0,0 +1,159 @@
+from pathlib import Path
+
+import cv2
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+
+
+class DetectorBackend:
+    # search the eyes only inside the faces
+    uses_faces = False
+    # the faces come with the centers of both eyes, no eye search is needed
+    landmark_eyes = False
+
+    def __init__(self, conf):
+        """
+        The models that find faces and eyes on a grayscale image, selected with EyeDetectionConf.backend.
+        The EyeDetector around a backend takes care of decoding, scaling, caching and the early exit.
+
+        :param conf: The EyeDetectionConf.
+        """
+        self.conf = conf
+
+    def detect_faces(self, gray, minSize):
+        """
+        :return: The faces as (x, y, w, h), or (x, y, w, h, (right eye, left eye)) with landmark_eyes.
+        """
+        raise NotImplementedError
+
+    def detect_eyes(self, gray, minSize, maxSize=None):
+        """
+        :return: The eyes as (x, y, w, h).
+        """
+        raise NotImplementedError
+
+
+def _model_path(conf, default_name, url):
+    path = Path(conf.face_model) if conf.face_model else SCRIPT_DIR / default_name
+    if not path.exists():
+        raise FileNotFoundError(f"Face model {path} of the {conf.backend} backend is missing, run "
+                                f"python3 -m gaze_detection.fetch_models, download it from {url} into "
+                                f"gaze_detection/ or set EyeDetectionConf(face_model=...)")
+    return str(path)
+
+
+class HaarBackend(DetectorBackend):
+    def __init__(self, conf):
+        """
+        Haar cascades of OpenCV, the eye cascade bundled with this package and the default frontal face cascade.
+        """
+        super().__init__(conf)
+        # backends with a face model of their own always search inside the faces
+        self.uses_faces = self.uses_faces or bool(conf.face_roi)
+        self.eyeCascade = cv2.CascadeClassifier(str(SCRIPT_DIR / "haarcascade_eye.xml"))
+        self.faceCascade = self._face_cascade() if self.uses_faces else None
+
+    def _face_cascade(self):
+        return cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+    def detect_faces(self, gray, minSize):
+        return list(self.faceCascade.detectMultiScale(gray, scaleFactor=self.conf.scale_factor, minNeighbors=5,
+                                                      minSize=minSize))
+
+    def detect_eyes(self, gray, minSize, maxSize=None):
+        return list(self.eyeCascade.detectMultiScale(
+            gray,
+            scaleFactor=self.conf.scale_factor,
+            minNeighbors=3,
+            minSize=minSize,
+            maxSize=maxSize or (0, 0),
+        ))
+
+
+class LbpBackend(HaarBackend):
+    uses_faces = True
+
+    def __init__(self, conf):
+        """
+        LBP face cascade, several times faster than the Haar face cascade, then the Haar eye cascade inside
+        the faces.
+        """
+        self._path = _model_path(conf, "lbpcascade_frontalface_improved.xml",
+                                 "https://github.com/opencv/opencv/tree/4.x/data/lbpcascades")
+        super().__init__(conf)
+
+    def _face_cascade(self):
+        return cv2.CascadeClassifier(self._path)
+
+
+class DnnBackend(HaarBackend):
+    uses_faces = True
+
+    def __init__(self, conf):
+        """
+        The YuNet DNN face detector of OpenCV on the CPU, then the Haar eye cascade inside the faces.
+        """
+        path = _model_path(conf, "face_detection_yunet_2023mar.onnx",
+                           "https://github.com/opencv/opencv_zoo/tree/main/models/face_detection_yunet")
+        super().__init__(conf)
+        self.faceNet = cv2.FaceDetectorYN.create(path, "", (320, 320), score_threshold=0.7)
+
+    def _face_cascade(self):
+        return None
+
+    def detect_faces(self, gray, minSize):
+        height, width = gray.shape[:2]
+        self.faceNet.setInputSize((width, height))
+        _, faces = self.faceNet.detect(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+        if faces is None:
+            return []
+        return [self._face(face) for face in faces if face[2] >= minSize[0] and face[3] >= minSize[1]]
+
+    @staticmethod
+    def _face(face):
+        x, y, w, h = (int(value) for value in face[:4])
+        return max(0, x), max(0, y), w, h
+
+
+class LandmarkBackend(DnnBackend):
+    landmark_eyes = True
+
+    def __init__(self, conf):
+        """
+        The YuNet DNN face detector, which also returns the centers of both eyes, so no eye cascade runs at
+        all. Only frontal faces are found, so a face with landmarks means the visitor faces the robot.
+        """
+        super().__init__(conf)
+
+    @staticmethod
+    def _face(face):
+        x, y, w, h = (int(value) for value in face[:4])
+        # the landmarks start with the right and the left eye
+        eyes = ((float(face[4]), float(face[5])), (float(face[6]), float(face[7])))
+        return max(0, x), max(0, y), w, h, eyes
+
+
+BACKENDS = {
+    "haar": HaarBackend,
+    "lbp": LbpBackend,
+    "dnn": DnnBackend,
+    "landmarks": LandmarkBackend,
+}
+
+
+def create_backend(conf):
+    """
+    :param conf: The EyeDetectionConf, its backend is one of BACKENDS.
+    """
+    if conf.backend not in BACKENDS:
+        raise ValueError(f"Unknown detector backend {conf.backend}, choose one of {', '.join(BACKENDS)}")
+    return BACKENDS[conf.backend](conf)
+
+
+def eyes_around_landmarks(face, minSize):
+    """
+    :return: Eye boxes around the landmarks of a face, a quarter of the face wide.
+    """
+    x, y, w, h, points = face
+    size = max(minSize[0], w // 4)
+    return [(int(px - size / 2), int(py - size / 2), size, size) for px, py in points]
@@ -1,10 +1,13 @@
-from pathlib import Path
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
 
 import cv2
 import numpy as np
-from numpy import array
 
-from sic_framework.core import sic_logging
+from sic_framework.core import sic_logging, utils
 from sic_framework.core.component_manager_python2 import SICComponentManager
 from sic_framework.core.component_python2 import SICComponent
 from sic_framework.core.connector import SICConnector
@@ -15,15 +18,45 @@ from sic_framework.core.message_python2 import (
     CompressedImageRequest,
     SICConfMessage,
     SICMessage,
+    SICRequest,
 )
-from sic_framework.core.service_python2 import SICService
+
+from gaze_detection.backends import create_backend, eyes_around_landmarks
+from gaze_detection.geometry import suppress_duplicates
+from tracing import enable_from_environment, tracer
+
+# number of frames whose detection results are kept, requests for the same frame reuse them
+RESULT_CACHE_SIZE = 8
+# the early exit scans the eye sizes in this many bands, largest eyes first
+EARLY_EXIT_BANDS = 3
+# eyes are searched in this upper part of a face box
+FACE_EYE_REGION = 0.6
+# the JPEG decoder can scale down by these factors while decoding, almost for free
+JPEG_REDUCED_GRAYSCALE = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
 
 
 class EyeDetectionConf(SICConfMessage):
-    def __init__(self, minW=30, minH=30):
+    def __init__(self, minW=30, minH=30, face_roi=False, face_scale=0.5, minFaceW=60, minFaceH=60, jpeg_reduction=1,
+                 backend="haar", face_model=None, scale=1.0, scale_factor=1.1):
         """
         :param minW       Minimum possible eye width in pixels
         :param minH       Minimum possible eye height in pixels
+        :param face_roi   Find the faces first and only search eyes in the upper part of every face
+        :param face_scale Resolution at which faces are searched, relative to the frame
+        :param minFaceW   Minimum possible face width in pixels of the frame
+        :param minFaceH   Minimum possible face height in pixels of the frame
+        :param jpeg_reduction 1, 2, 4 or 8, JPEG frames are decoded at this fraction of their resolution. Only
+                          for JPEG bytes, SIC decodes the frames of its camera messages to RGB before
+                          any callback sees them
+        :param backend    Models finding the faces and eyes: haar, lbp, dnn or landmarks, see backends.py
+        :param face_model Path of the face model of the lbp, dnn and landmarks backends
+        :param scale      Resolution at which the frame is scanned, relative to the frame, boxes stay in frame pixels
+        :param scale_factor Step between two levels of the cascade image pyramids, larger is faster but coarser
         """
         SICConfMessage.__init__(self)
 
@@ -31,17 +64,329 @@ class EyeDetectionConf(SICConfMessage):
         self.minW = minW
         self.minH = minH
 
+        # Two-stage detection, faces at a reduced resolution and then eyes inside the faces
+        self.face_roi = face_roi
+        self.face_scale = face_scale
+        self.minFaceW = minFaceW
+        self.minFaceH = minFaceH
+
+        # Compressed frames are decoded straight to a smaller grayscale image
+        if jpeg_reduction not in JPEG_REDUCED_GRAYSCALE:
+            raise ValueError(f"Unsupported jpeg_reduction {jpeg_reduction}, choose one of "
+                             f"{', '.join(str(factor) for factor in JPEG_REDUCED_GRAYSCALE)}")
+        self.jpeg_reduction = jpeg_reduction
+
+        # The backend; all but haar have their own face model and always search the eyes inside faces
+        self.backend = backend
+        self.face_model = face_model
+
+        # Scan a downscaled frame with a coarser image pyramid, see autotune.py to find both values
+        self.scale = scale
+        self.scale_factor = scale_factor
+
+
+class EyeDetectionResult(BoundingBoxesMessage):
+    def __init__(self, bboxes, frame_id=None, timestamp=None, processing_time=0.0, complete=True, faces=None):
+        """
+        The eyes found on one frame.
+
+        :param bboxes: The BoundingBox of every eye.
+        :param faces: The BoundingBox of every face when the eyes were searched inside faces, otherwise None.
+        :param frame_id: Identifier of the frame, e.g. the timestamp of the camera message.
+        :param timestamp: Time the frame was analysed, as returned by time.time().
+        :param processing_time: Seconds spent on the detection.
+        :param complete: False if the scan stopped early, the count is then a lower bound.
+        """
+        BoundingBoxesMessage.__init__(self, bboxes)
+        self.frame_id = frame_id
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.processing_time = processing_time
+        self.complete = complete
+        self.faces = faces
+
+    @property
+    def count(self):
+        return len(self.bboxes)
+
+    @property
+    def eyes_on_image(self):
+        """
+        :return: True if at least two eyes were found.
+        """
+        return self.count >= 2
+
+
+class EyeDetectionRequest(CompressedImageRequest):
+    def __init__(self, image, frame_id=None, min_eyes=None):
+        """
+        :param image: The RGB image, or the bytes of a JPEG image.
+        :param frame_id: Identifier of the frame, a second request for the same frame returns the cached result.
+        :param min_eyes: Stop scanning as soon as this many eyes were found, None to find all eyes.
+        """
+        CompressedImageRequest.__init__(self, image)
+        self.frame_id = frame_id
+        self.min_eyes = min_eyes
+
+
+class EyeDetectionBatchRequest(SICRequest):
+    def __init__(self, images, frame_ids=None, min_eyes=None, compress=True):
+        """
+        Several frames in one request, e.g. the frames of a recorded session or of several cameras, so the
+        per-message overhead is paid once for all of them.
+
+        :param images: The RGB images, or the bytes of JPEG images.
+        :param frame_ids: Identifier of every frame, None to skip the cache.
+        :param min_eyes: Stop scanning a frame as soon as this many eyes were found, None to find all eyes.
+        :param compress: Send RGB images as JPEG bytes, the detector decodes them straight to grayscale.
+        """
+        SICRequest.__init__(self)
+        self.images = [SICMessage.np2jpeg(image) if compress and isinstance(image, np.ndarray) and image.ndim == 3
+                       else image for image in images]
+        self.frame_ids = list(frame_ids) if frame_ids is not None else [None] * len(self.images)
+        if len(self.frame_ids) != len(self.images):
+            raise ValueError("One frame id per image is needed")
+        self.min_eyes = min_eyes
+
+
+class EyeDetectionBatchResult(SICMessage):
+    def __init__(self, results):
+        """
+        :param results: The EyeDetectionResult of every frame of the EyeDetectionBatchRequest, in order.
+        """
+        SICMessage.__init__(self)
+        self.results = results
+
+
+class EyeDetector:
+    def __init__(self, conf=None):
+        """
+        The eye detection, without the SIC component around it so it can also run in other processes and
+        benchmarks. The models are provided by the backend selected in the configuration.
+
+        :param conf: An EyeDetectionConf, the defaults if None.
+        """
+        self.params = conf or EyeDetectionConf()
+        self.backend = create_backend(self.params)
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+        # the backend and the reused grayscale buffer are used by one detection at a time
+        self._detect_lock = threading.Lock()
+        self._gray = None
+        self._small = None
+
+    def detect(self, image, frame_id=None, min_eyes=None):
+        """
+        Find the eyes on an image, every frame is converted and scanned only once.
+
+        :param image: The RGB image, or the bytes of a JPEG image.
+        :param frame_id: Identifier of the frame, None to skip the cache.
+        :param min_eyes: Stop scanning as soon as this many eyes were found, None to find all eyes.
+        :return: An EyeDetectionResult, with the boxes in pixels of the full resolution frame.
+        """
+        result = self._cached_result(frame_id, min_eyes)
+        if result is not None:
+            return result
+
+        with self._detect_lock, tracer.span("eye_detection.detect", early_exit=min_eyes is not None,
+                                            backend=self.params.backend, face_roi=self.backend.uses_faces):
+            started_at = time.perf_counter()
+            gray, scale = self.grayscale(image)
+            minSize = (max(1, int(self.params.minW * scale)), max(1, int(self.params.minH * scale)))
+
+            faces = None
+            if self.backend.uses_faces:
+                faces = self._detect_faces(gray, scale)
+                eyes, complete = self._detect_in_faces(gray, faces, minSize, min_eyes)
+            elif min_eyes is None:
+                eyes = list(self._detect_eyes(gray, minSize))
+                complete = True
+            else:
+                eyes, complete = self._detect_at_least(gray, minSize, min_eyes)
+
+            result = EyeDetectionResult(
+                self._to_frame(eyes, scale),
+                frame_id=frame_id,
+                processing_time=time.perf_counter() - started_at,
+                complete=complete,
+                faces=None if faces is None else self._to_frame([face[:4] for face in faces], scale),
+            )
+
+        if frame_id is not None:
+            with self._results_lock:
+                self._results[frame_id] = result
+                while len(self._results) > RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+        return result
+
+    def are_eyes_on_image(self, image, frame_id=None):
+        """
+        :return: True if at least two eyes are on the image, stops scanning once two were found.
+        """
+        return self.detect(image, frame_id=frame_id, min_eyes=2).eyes_on_image
+
+    def detect_batch(self, images, frame_ids=None, min_eyes=None):
+        """
+        :return: The EyeDetectionResult of every image, in order.
+        """
+        frame_ids = frame_ids if frame_ids is not None else [None] * len(images)
+        with tracer.span("eye_detection.batch", frames=len(images)):
+            return [self.detect(image, frame_id=frame_id, min_eyes=min_eyes)
+                    for image, frame_id in zip(images, frame_ids)]
+
+    def grayscale(self, image):
+        """
+        Convert a frame to the grayscale image the cascades run on, with as few copies as possible.
+
+        JPEG bytes, e.g. of a recording, are decoded straight to grayscale, at 1 / jpeg_reduction of their
+        resolution. The frames of the SIC camera arrive as RGB arrays, the framework decodes them while
+        deserializing the message. They are converted into a buffer that is reused as long as the frame
+        size does not change, so the buffer is only valid until the next call and callers have to hold
+        _detect_lock. The result is then downscaled to the configured scale, unless it already is smaller.
+
+        :return: The grayscale image and its size relative to the frame.
+        """
+        if isinstance(image, (bytes, bytearray, memoryview)) or (isinstance(image, np.ndarray) and image.ndim == 1):
+            reduction = int(self.params.jpeg_reduction)
+            # frombuffer does not copy the bytes
+            gray = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), JPEG_REDUCED_GRAYSCALE[reduction])
+            if gray is None:
+                raise ValueError("Could not decode the compressed frame")
+            return self._downscale(gray, 1.0 / reduction)
+
+        # no copy when the decoded image already is uint8
+        rgb = np.asarray(image, dtype=np.uint8)
+        if rgb.ndim == 2:
+            return self._downscale(rgb, 1.0)
+        if self._gray is None or self._gray.shape != rgb.shape[:2]:
+            self._gray = np.empty(rgb.shape[:2], dtype=np.uint8)
+        cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY, dst=self._gray)
+        return self._downscale(self._gray, 1.0)
+
+    def _downscale(self, gray, scale):
+        resize = float(self.params.scale) / scale
+        if resize >= 1.0:
+            return gray, scale
+        height, width = gray.shape[:2]
+        size = (max(1, int(round(width * resize))), max(1, int(round(height * resize))))
+        # reused like the grayscale buffer
+        if self._small is None or self._small.shape != (size[1], size[0]):
+            self._small = np.empty((size[1], size[0]), dtype=np.uint8)
+        cv2.resize(gray, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        return self._small, scale * size[0] / float(width)
+
+    @staticmethod
+    def _to_frame(boxes, scale):
+        if scale == 1.0:
+            return [BoundingBox(int(x), int(y), int(w), int(h)) for (x, y, w, h) in boxes]
+        return [BoundingBox(int(x / scale), int(y / scale), int(w / scale), int(h / scale)) for (x, y, w, h) in boxes]
+
+    def _cached_result(self, frame_id, min_eyes):
+        if frame_id is None:
+            return None
+        with self._results_lock:
+            result = self._results.get(frame_id)
+        # an incomplete result only answers requests that need no more eyes than it found
+        if result is None or not (result.complete or (min_eyes is not None and result.count >= min_eyes)):
+            return None
+        return result
+
+    def _detect_eyes(self, gray, minSize, maxSize=None):
+        return self.backend.detect_eyes(gray, minSize, maxSize)
+
+    def _detect_at_least(self, gray, minSize, min_eyes):
+        """
+        Scan the eye sizes in bands, largest first, and stop once enough eyes were found.
+
+        Large windows are cheap to scan and a visitor close to the robot has large eyes, so most frames
+        with a visitor are answered after the first bands. An eye whose detections are split over two
+        bands is found in both, so the eyes of all bands are merged before they are counted. A band can
+        also miss an eye at its border, so instead of the last band, which holds the smallest and most
+        expensive sizes, the whole frame is scanned and the answer is always the one of a full scan.
+
+        :return: The eyes found and whether all sizes were scanned.
+        """
+        minW, minH = minSize
+        largest = min(gray.shape[:2])
+        if largest <= max(minW, minH):
+            return list(self._detect_eyes(gray, minSize)), True
+
+        # geometric band borders, from the largest eye size down to the minimum
+        ratio = (largest / float(minW)) ** (1.0 / EARLY_EXIT_BANDS)
+        eyes = []
+        upper = largest
+        for band in range(EARLY_EXIT_BANDS - 1):
+            lower = max(minW, int(upper / ratio))
+            scale = lower / float(minW)
+            eyes += list(self._detect_eyes(gray, (lower, int(minH * scale)), maxSize=(upper, upper)))
+            eyes = [eyes[index] for index in suppress_duplicates(eyes)] if eyes else eyes
+            if len(eyes) >= min_eyes:
+                return eyes, False
+            upper = lower - 1
+            if upper < minW:
+                break
+        return list(self._detect_eyes(gray, minSize)), True
+
+    def _detect_faces(self, gray, scale):
+        """
+        :param scale: Size of the grayscale image relative to the frame.
+        :return: The faces as (x, y, w, h) in pixels of the grayscale image, found on a downscaled copy.
+        """
+        # face_scale is relative to the frame, the grayscale image may already be smaller
+        resize = min(1.0, float(self.params.face_scale) / scale)
+        small = gray
+        if resize != 1.0:
+            small = cv2.resize(gray, None, fx=resize, fy=resize, interpolation=cv2.INTER_AREA)
+        face_scale = scale * resize
+        faces = self.backend.detect_faces(
+            small,
+            (max(1, int(self.params.minFaceW * face_scale)), max(1, int(self.params.minFaceH * face_scale))),
+        )
+        if resize == 1.0:
+            return faces
+        return [tuple(int(value / resize) for value in face[:4])
+                + tuple(tuple((px / resize, py / resize) for px, py in points) for points in face[4:])
+                for face in faces]
+
+    def _detect_in_faces(self, gray, faces, minSize, min_eyes):
+        """
+        Search the eyes only in the upper part of every face, which also drops eyes found outside a face.
+
+        :return: The eyes found in pixels of the grayscale image and whether all faces were scanned.
+        """
+        eyes = []
+        for index, face in enumerate(faces):
+            if self.backend.landmark_eyes:
+                eyes += eyes_around_landmarks(face, minSize)
+            else:
+                x, y, w, h = face[:4]
+                region = gray[y:y + int(h * FACE_EYE_REGION), x:x + w]
+                # an eye is at most half as wide as the face
+                found = self._detect_eyes(region, minSize, maxSize=(max(1, w // 2), max(1, h // 2)))
+                eyes += [(x + ex, y + ey, ew, eh) for (ex, ey, ew, eh) in found]
+            if min_eyes is not None and len(eyes) >= min_eyes:
+                return eyes, index == len(faces) - 1
+        return eyes, True
+
+
+def _reply(detector, request):
+    # the reply of the component, also used by EyeDetection in process
+    if isinstance(request, EyeDetectionBatchRequest):
+        return EyeDetectionBatchResult(
+            detector.detect_batch(request.images, frame_ids=request.frame_ids, min_eyes=request.min_eyes))
+    if isinstance(request, EyeDetectionRequest):
+        return detector.detect(request.image, frame_id=request.frame_id, min_eyes=request.min_eyes)
+    return detector.detect(request.image, frame_id=request._timestamp)
+
 
 class EyeDetectionComponent(SICComponent):
-    def __init__(self, *args, **kwargs):
-        super(EyeDetectionComponent, self).__init__(*args, **kwargs)
-        script_dir = Path(__file__).parent.resolve()
-        cascadePath = str(script_dir / "haarcascade_eye.xml")
-        self.eyeCascade = cv2.CascadeClassifier(cascadePath)
+    def set_config(self, new=None):
+        super(EyeDetectionComponent, self).set_config(new)
+        # the detector holds the cascades for the current configuration
+        self.detector = EyeDetector(self.params)
 
     @staticmethod
     def get_inputs():
-        return [CompressedImageMessage, CompressedImageRequest]
+        return [CompressedImageMessage, CompressedImageRequest, EyeDetectionRequest, EyeDetectionBatchRequest]
 
     @staticmethod
     def get_conf():
@@ -49,53 +394,159 @@ class EyeDetectionComponent(SICComponent):
 
     @staticmethod
     def get_output():
-        return BoundingBoxesMessage
+        return EyeDetectionResult
 
     def on_message(self, message):
-        bboxes = self.detect(message.image)
-        self.output_message(bboxes)
+        result = self.detect(message.image, frame_id=message._timestamp)
+        self.output_message(result)
 
     def on_request(self, request):
-        return self.detect(request.image)
+        return _reply(self.detector, request)
 
-    def detect(self, image):
-        img = array(image).astype(np.uint8)
+    def detect(self, image, frame_id=None, min_eyes=None):
+        return self.detector.detect(image, frame_id=frame_id, min_eyes=min_eyes)
 
-        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    def are_eyes_on_image(self, image, frame_id=None):
+        return self.detector.are_eyes_on_image(image, frame_id=frame_id)
 
-        eyes = self.eyeCascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=3,
-            minSize=(int(self.params.minW), int(self.params.minH)),
-        )
 
-        eyes = [BoundingBox(x, y, w, h) for (x, y, w, h) in eyes]
+class EyeDetection(SICConnector):
+    component_class = EyeDetectionComponent
 
-        return BoundingBoxesMessage(eyes)
+    # requests of request_async that wait for their reply at the same time
+    MAX_IN_FLIGHT = 4
 
-    def are_eyes_on_image(self, image):
-        img = array(image).astype(np.uint8)
+    def __init__(self, ip="localhost", log_level=sic_logging.INFO, conf=None, in_process=None):
+        """
+        :param in_process: Run the detection in this process instead of in an EyeDetectionComponent, so frames
+            and results are passed by reference instead of being serialized and sent through redis. No
+            component is started and no redis connection is made, only frames of a connected SIC camera
+            still come through redis. None to use it when EYE_DETECTION_IN_PROCESS is 1. A blocking request
+            runs in the calling thread and has no timeout, use request_async to give up waiting.
+        """
+        if in_process is None:
+            in_process = os.getenv("EYE_DETECTION_IN_PROCESS", "0") == "1"
+        self.in_process = in_process
+        if not in_process:
+            super(EyeDetection, self).__init__(ip=ip, log_level=log_level, conf=conf)
+            return
 
-        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        # the detector the component would hold, requests are answered as the component does
+        self._detector = EyeDetector(conf or EyeDetectionComponent.get_conf())
+        self._callbacks = []
+        self._ip = utils.get_ip_adress()
+        self.output_channel = EyeDetectionComponent.get_output_channel(self._ip)
 
-        eyes = self.eyeCascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=3,
-            minSize=(int(self.params.minW), int(self.params.minH)),
-        )
+    def register_callback(self, callback):
+        if not self.in_process:
+            return super(EyeDetection, self).register_callback(callback)
+        self._callbacks.append(callback)
 
-        eyes = [BoundingBox(x, y, w, h) for (x, y, w, h) in eyes]
+    def connect(self, component):
+        """
+        Connect the output of a component, e.g. the camera, to the input of the eye detection. In process
+        the frames still come from redis, but are deserialized only once and the results stay local.
+        """
+        if not self.in_process:
+            return super(EyeDetection, self).connect(component)
+        component.register_callback(self._on_message)
 
-        return len(eyes) >= 2
+    def send_message(self, message):
+        if not self.in_process:
+            return super(EyeDetection, self).send_message(message)
+        message._timestamp = self._get_timestamp()
+        self._on_message(message)
 
+    def request(self, request, timeout=100.0, block=True):
+        if not self.in_process:
+            return super(EyeDetection, self).request(request, timeout=timeout, block=block)
+        request._timestamp = self._get_timestamp()
+        if not block:
+            self.request_async(request, timeout)
+            return None
+        return _reply(self._detector, request)
 
-class EyeDetection(SICConnector):
-    component_class = EyeDetectionComponent
+    def request_async(self, request, timeout=100.0):
+        """
+        Send a request without waiting for the reply, so several frames can be in flight at once.
+
+        :return: A Future of the reply, its result raises a TimeoutError if the reply took longer than timeout.
+        """
+        if not hasattr(self, "_executor"):
+            self._executor = ThreadPoolExecutor(max_workers=self.MAX_IN_FLIGHT,
+                                                thread_name_prefix="eye-detection-request")
+        future = self._executor.submit(self.request, request, timeout)
+        if not self.in_process:
+            return future
+        return self._with_timeout(future, timeout)
+
+    @staticmethod
+    def _with_timeout(future, timeout):
+        """
+        A detection in process cannot be interrupted, the returned Future stops waiting for it after timeout
+        while the detection itself finishes in the background.
+        """
+        result = Future()
+
+        def expire():
+            try:
+                result.set_exception(TimeoutError(f"No eye detection reply within {timeout} seconds"))
+            except InvalidStateError:
+                pass
+
+        def done(finished):
+            timer.cancel()
+            try:
+                if finished.exception() is not None:
+                    result.set_exception(finished.exception())
+                else:
+                    result.set_result(finished.result())
+            except InvalidStateError:
+                pass
+
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+        future.add_done_callback(done)
+        return result
+
+    def detect_batch(self, images, frame_ids=None, min_eyes=None, timeout=100.0):
+        """
+        :return: The EyeDetectionResult of every image, in order.
+        """
+        return self.request(self._batch_request(images, frame_ids, min_eyes), timeout=timeout).results
+
+    def detect_batch_async(self, images, frame_ids=None, min_eyes=None, timeout=100.0):
+        """
+        :return: A Future of the EyeDetectionBatchResult, the results of every image are in its results.
+        """
+        return self.request_async(self._batch_request(images, frame_ids, min_eyes), timeout=timeout)
+
+    def _batch_request(self, images, frame_ids, min_eyes):
+        # in process there is nothing to send, compressing would only cost time
+        return EyeDetectionBatchRequest(images, frame_ids, min_eyes, compress=not self.in_process)
+
+    def _on_message(self, message):
+        result = self._detector.detect(message.image, frame_id=message._timestamp)
+        result._timestamp = message._timestamp
+        result._previous_component_name = EyeDetectionComponent.get_component_name()
+        for callback in self._callbacks:
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"Error in eye detection callback: {e}")
+
+    def stop(self):
+        if hasattr(self, "_executor"):
+            self._executor.shutdown(wait=False)
+        # in process, or the redis connection failed in __init__, there is nothing to stop
+        if getattr(self, "in_process", False) or not hasattr(self, "_redis"):
+            return
+        super(EyeDetection, self).stop()
 
 
 def main():
+    enable_from_environment(suffix="_eye_detection")
     SICComponentManager([EyeDetectionComponent])
 
 
@@ -0,0 +1,54 @@
+"""
+Downloads the face models of the lbp, dnn and landmarks backends into gaze_detection/, where
+EyeDetectionConf looks for them when face_model is not set. The haar backend needs no download.
+
+To run this file:
+PYTHONPATH=. python3 -m gaze_detection.fetch_models
+PYTHONPATH=. python3 -m gaze_detection.fetch_models --backends lbp
+"""
+
+import argparse
+import urllib.request
+
+from gaze_detection.backends import SCRIPT_DIR
+
+MODELS = {
+    "lbp": ("lbpcascade_frontalface_improved.xml",
+            "https://raw.githubusercontent.com/opencv/opencv/4.x/data/lbpcascades/lbpcascade_frontalface_improved.xml"),
+    "dnn": ("face_detection_yunet_2023mar.onnx",
+            "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx"),
+}
+# the landmarks backend uses the model of the dnn backend
+MODELS["landmarks"] = MODELS["dnn"]
+
+
+def fetch(backend, force=False):
+    """
+    :return: The path of the model file of a backend, downloaded if it is not there yet.
+    """
+    name, url = MODELS[backend]
+    path = SCRIPT_DIR / name
+    if path.exists() and not force:
+        return path
+    print(f"Downloading {url}")
+    partial = path.with_name(path.name + ".part")
+    urllib.request.urlretrieve(url, partial)
+    partial.replace(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--force", action="store_true", help="download again if the file exists")
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        try:
+            print(f"{backend}: {fetch(backend, args.force)}")
+        except OSError as e:
+            print(f"Error downloading the model of the {backend} backend: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# per slot: sequence number, timestamp, height, width, channels
+_SLOT_HEADER = struct.Struct("qdqqq")
+# before the slots: sequence number of the newest frame
+_RING_HEADER = struct.Struct("q")
+# sequence number of a slot that is being written
+_WRITING = -1
+# longest wait of the writer to wake the readers, a reader that died holding the lock must not stall the camera
+_NOTIFY_TIMEOUT = 0.01
+
+
+class SharedFrameRing:
+    def __init__(self, name=None, slots=4, max_frame_bytes=1920 * 1080 * 3, create=True, new_frame=None):
+        """
+        Ring buffer of camera frames in shared memory, written by one process and read zero-copy by
+        vision worker processes.
+
+        Each slot stores one frame and its sequence number, so a reader can tell whether the frame it
+        is looking at was overwritten in the meantime. Readers keep their own cursor, see RingReader.
+
+        :param name: Name of the shared memory block, a new unique name if None.
+        :param slots: Number of frames kept, a reader has slots - 1 frame intervals to process a frame.
+        :param max_frame_bytes: Size of the largest frame.
+        :param create: Create the block, False to attach to a block created by another process.
+        :param new_frame: The multiprocessing Condition notified on every write, created with the block if None.
+        """
+        self.slots = slots
+        self.max_frame_bytes = max_frame_bytes
+        self._slot_size = _SLOT_HEADER.size + max_frame_bytes
+        size = _RING_HEADER.size + slots * self._slot_size
+        self._memory = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self._memory.name
+        self._owner = create
+        self._buffer = self._memory.buf
+        # readers sleep on it instead of polling for the next frame
+        self._new_frame = new_frame if new_frame is not None else multiprocessing.Condition()
+        if create:
+            _RING_HEADER.pack_into(self._buffer, 0, 0)
+            for slot in range(slots):
+                _SLOT_HEADER.pack_into(self._buffer, self._slot_offset(slot), 0, 0.0, 0, 0, 0)
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        :param spec: The spec of a ring created by another process.
+        """
+        return cls(create=False, **spec)
+
+    @property
+    def spec(self):
+        """
+        :return: Description to attach to this ring from another process. It holds a multiprocessing
+            Condition, so it can only be passed to a process when it is started, e.g. in its args.
+        """
+        return {"name": self.name, "slots": self.slots, "max_frame_bytes": self.max_frame_bytes,
+                "new_frame": self._new_frame}
+
+    @property
+    def sequence(self):
+        """
+        :return: Sequence number of the newest frame, 0 before the first frame.
+        """
+        return _RING_HEADER.unpack_from(self._buffer, 0)[0]
+
+    def write(self, frame, timestamp=None):
+        """
+        Copy a frame into the next slot, only one process may write.
+
+        :param frame: uint8 array of height x width (x channels).
+        :param timestamp: Capture time of the frame, now if None.
+        :return: The sequence number of the frame.
+        """
+        frame = np.asarray(frame, dtype=np.uint8)
+        if frame.nbytes > self.max_frame_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit in slots of {self.max_frame_bytes} bytes")
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+
+        sequence = self.sequence + 1
+        offset = self._slot_offset(sequence % self.slots)
+        # readers that see the writing marker skip the slot
+        _SLOT_HEADER.pack_into(self._buffer, offset, _WRITING, 0.0, 0, 0, 0)
+        self._frame_view(offset, height, width, channels)[...] = frame.reshape(height, width, channels)
+        _SLOT_HEADER.pack_into(self._buffer, offset, sequence,
+                               timestamp if timestamp is not None else time.time(), height, width, channels)
+        _RING_HEADER.pack_into(self._buffer, 0, sequence)
+        if self._new_frame.acquire(timeout=_NOTIFY_TIMEOUT):
+            try:
+                self._new_frame.notify_all()
+            finally:
+                self._new_frame.release()
+        return sequence
+
+    def wait_newer(self, sequence, timeout=None):
+        """
+        Sleep until a frame newer than sequence was written.
+
+        :param timeout: Seconds to wait, None to wait forever.
+        :return: True if there is a newer frame, False on a timeout.
+        """
+        with self._new_frame:
+            return self._new_frame.wait_for(lambda: self.sequence > sequence, timeout)
+
+    def read(self, sequence):
+        """
+        :param sequence: Sequence number of the frame.
+        :return: (timestamp, frame) with the frame a view into shared memory, None if the slot holds
+            another frame by now.
+        """
+        offset = self._slot_offset(sequence % self.slots)
+        slot_sequence, timestamp, height, width, channels = _SLOT_HEADER.unpack_from(self._buffer, offset)
+        if slot_sequence != sequence:
+            return None
+        frame = self._frame_view(offset, height, width, channels)
+        return timestamp, frame if channels > 1 else frame[:, :, 0]
+
+    def is_valid(self, sequence):
+        """
+        :return: True if the frame was not overwritten, check after using a frame returned by read.
+        """
+        return _SLOT_HEADER.unpack_from(self._buffer, self._slot_offset(sequence % self.slots))[0] == sequence
+
+    def close(self):
+        self._buffer = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+    def _slot_offset(self, slot):
+        return _RING_HEADER.size + slot * self._slot_size
+
+    def _frame_view(self, offset, height, width, channels):
+        start = offset + _SLOT_HEADER.size
+        return np.ndarray((height, width, channels), dtype=np.uint8, buffer=self._buffer,
+                          offset=start)
+
+
+class RingReader:
+    def __init__(self, ring):
+        """
+        A reader's position in a SharedFrameRing, every reader only gets the newest frame.
+
+        :param ring: The SharedFrameRing.
+        """
+        self.ring = ring
+        self.cursor = ring.sequence
+        # frames that were written but never read by this reader
+        self.skipped = 0
+
+    def next(self, timeout=None):
+        """
+        Wait for a frame newer than the last one returned.
+
+        :param timeout: Seconds to wait, None to wait forever.
+        :return: (sequence, timestamp, frame) with the frame a view into shared memory, None on a timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sequence = self.ring.sequence
+            if sequence > self.cursor:
+                frame = self.ring.read(sequence)
+                if frame is not None:
+                    self.skipped += sequence - self.cursor - 1
+                    self.cursor = sequence
+                    return (sequence,) + frame
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            # a frame that could not be read is being overwritten by a newer one
+            self.ring.wait_newer(max(self.cursor, sequence), remaining)
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+
+from tracing import tracer
+
+
+class GazeTracker:
+    def __init__(self, frames, eyes_on_image, look_frames=2, away_frames=3, grace_period=1.0,
+                 frame_timeout=0.5, missed_frames=4):
+        """
+        Keeps track of whether the visitor looks at the robot, in a background thread.
+
+        Every frame is checked as soon as it arrives, so asking for the current state never waits for a
+        frame or a detection. The state only changes after several frames agree (hysteresis), and the
+        visitor has to look away for a while before the attention counts as lost, so blinking or a
+        missed detection does not stop the robot.
+
+        :param frames: A LatestFrame (or queue) of (frame_id, image) tuples, its get(timeout=...) raises queue.Empty.
+        :param eyes_on_image: Function (frame_id, image) -> True if the visitor looks at the camera.
+        :param look_frames: Consecutive frames with eyes needed to count as looking.
+        :param away_frames: Consecutive frames without eyes needed to count as looking away.
+        :param grace_period: Seconds the visitor may look away before the attention is lost.
+        :param frame_timeout: Seconds to wait for a frame before counting it as missed.
+        :param missed_frames: Consecutive missed frames after which the visitor counts as looking away, so a
+            detection that is only slower than frame_timeout does not count as looking away.
+        """
+        self.frames = frames
+        self.eyes_on_image = eyes_on_image
+        self.look_frames = look_frames
+        self.away_frames = away_frames
+        self.grace_period = grace_period
+        self.frame_timeout = frame_timeout
+        self.missed_frames = missed_frames
+
+        # the visitor starts out looking, so the robot does not stop before the first frames arrive
+        self.looking = True
+        self.last_seen_at = time.perf_counter()
+        self.frames_checked = 0
+        self._streak = 0
+        self._streak_value = True
+        self._missed = 0
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._worker.start()
+        return self
+
+    def register_callback(self, callback):
+        """
+        :param callback: Function without arguments, called from the tracker thread when the attention is lost.
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def is_looking(self):
+        """
+        :return: The debounced state, without waiting for a frame.
+        """
+        return self.looking
+
+    def attention_lost(self):
+        return not self.looking
+
+    def close(self):
+        self._stop.set()
+        if self._worker.is_alive():
+            self._worker.join(timeout=self.frame_timeout + 1.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                frame_id, image = self.frames.get(timeout=self.frame_timeout)
+            except queue.Empty:
+                # no camera, nobody to talk to, but a single late frame is only a slow detection
+                self._missed += 1
+                if self._missed >= self.missed_frames:
+                    self._update(False)
+                continue
+            self._missed = 0
+            try:
+                with tracer.span("gaze_tracker.check"):
+                    eyes = self.eyes_on_image(frame_id, image)
+            except Exception as e:
+                print(f"Error checking the gaze: {e}")
+                continue
+            self.frames_checked += 1
+            self._update(eyes)
+
+    def _update(self, eyes):
+        now = time.perf_counter()
+        if eyes:
+            self.last_seen_at = now
+        if eyes == self._streak_value:
+            self._streak += 1
+        else:
+            self._streak_value = eyes
+            self._streak = 1
+
+        if not self.looking and eyes and self._streak >= self.look_frames:
+            self.looking = True
+        elif (self.looking and not eyes and self._streak >= self.away_frames
+              and now - self.last_seen_at >= self.grace_period):
+            self.looking = False
+            with self._lock:
+                callbacks = list(self._callbacks)
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Error in attention lost callback: {e}")
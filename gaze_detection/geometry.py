@@ -0,0 +1,83 @@
+import numpy as np
+
+
+def boxes_to_array(boxes):
+    """
+    :param boxes: BoundingBox objects or (x, y, w, h) tuples.
+    :return: Array of shape (N, 4) with x, y, w, h per row.
+    """
+    if isinstance(boxes, np.ndarray):
+        return boxes.reshape(-1, 4).astype(np.float64, copy=False)
+    return np.array([(box.x, box.y, box.w, box.h) if hasattr(box, "x") else tuple(box[:4]) for box in boxes],
+                    dtype=np.float64).reshape(-1, 4)
+
+
+def _corners(boxes):
+    # columns of shape (N, 1) for broadcasting against rows of shape (1, M)
+    x1, y1 = boxes[:, 0:1], boxes[:, 1:2]
+    return x1, y1, x1 + boxes[:, 2:3], y1 + boxes[:, 3:4]
+
+
+def containment(outer, inner):
+    """
+    :return: Boolean array of shape (len(outer), len(inner)), True where the inner box lies completely
+        inside the outer box, e.g. an eye inside a face.
+    """
+    outer, inner = boxes_to_array(outer), boxes_to_array(inner)
+    ox1, oy1, ox2, oy2 = _corners(outer)
+    ix1, iy1, ix2, iy2 = (corner.T for corner in _corners(inner))
+    return (ox1 <= ix1) & (oy1 <= iy1) & (ix2 <= ox2) & (iy2 <= oy2)
+
+
+def iou(a, b):
+    """
+    :return: Array of shape (len(a), len(b)) with the intersection over union of every pair of boxes.
+    """
+    a, b = boxes_to_array(a), boxes_to_array(b)
+    ax1, ay1, ax2, ay2 = _corners(a)
+    bx1, by1, bx2, by2 = (corner.T for corner in _corners(b))
+    width = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    height = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    intersection = width * height
+    union = (a[:, 2:3] * a[:, 3:4]) + (b[:, 2] * b[:, 3])[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def assign_eyes(faces, eyes):
+    """
+    Assign every eye to the smallest face containing it, so an eye of a visitor standing in front of
+    another one is not counted for both.
+
+    :return: Array with the index of the face of every eye, -1 for eyes outside all faces.
+    """
+    faces = boxes_to_array(faces)
+    inside = containment(faces, eyes)
+    if not inside.size:
+        return np.full(inside.shape[1], -1, dtype=np.int64)
+    areas = np.where(inside, (faces[:, 2] * faces[:, 3])[:, None], np.inf)
+    return np.where(inside.any(axis=0), areas.argmin(axis=0), -1)
+
+
+def eyes_per_face(faces, eyes):
+    """
+    :return: Array with the number of eyes assigned to every face.
+    """
+    assignment = assign_eyes(faces, eyes)
+    return np.bincount(assignment[assignment >= 0], minlength=len(boxes_to_array(faces)))
+
+
+def suppress_duplicates(boxes, threshold=0.3):
+    """
+    Keep the largest of every group of boxes that overlap more than the threshold.
+
+    :return: Indices of the boxes that are kept.
+    """
+    boxes = boxes_to_array(boxes)
+    order = np.argsort(-(boxes[:, 2] * boxes[:, 3]), kind="stable")
+    overlaps = iou(boxes[order], boxes[order])
+    keep = np.ones(len(order), dtype=bool)
+    for index in range(len(order)):
+        if keep[index]:
+            # every smaller box that overlaps a kept box is dropped
+            keep[index + 1:] &= overlaps[index, index + 1:] < threshold
+    return order[keep]
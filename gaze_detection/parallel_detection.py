@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import cv2
+
+from gaze_detection.eye_detection import EyeDetectionResult, EyeDetector
+from gaze_detection.frame_ring import SharedFrameRing
+from gaze_detection.geometry import suppress_duplicates
+from gaze_detection.vision_worker import START_METHOD
+from sic_framework.core.message_python2 import BoundingBox
+
+# distribute whole frames over the workers, or split every frame into tiles
+FRAMES = "frames"
+TILES = "tiles"
+
+# set in every worker process by _init_worker
+_detector = None
+_ring = None
+
+
+def _init_worker(conf, ring_spec):
+    global _detector, _ring
+    # the workers already use all cores, OpenCV should not start threads of its own
+    cv2.setNumThreads(1)
+    _detector = EyeDetector(conf)
+    _ring = SharedFrameRing.attach(ring_spec)
+
+
+def _detect(sequence, left, right, min_eyes):
+    """
+    Detect the eyes on the columns left to right of a frame in the ring.
+
+    :return: Eyes and faces as (x, y, w, h) tuples in pixels of the frame, None if the frame was overwritten.
+    """
+    frame = _ring.read(sequence)
+    if frame is None:
+        return None
+    _, image = frame
+    result = _detector.detect(image[:, left:right], min_eyes=min_eyes)
+    del image, frame
+    if not _ring.is_valid(sequence):
+        return None
+    eyes = [(bbox.x + left, bbox.y, bbox.w, bbox.h) for bbox in result.bboxes]
+    faces = None if result.faces is None else [(bbox.x + left, bbox.y, bbox.w, bbox.h) for bbox in result.faces]
+    return eyes, faces, result.complete
+
+
+def _merge(boxes):
+    # boxes in the overlap of two tiles are found twice
+    return [boxes[index] for index in suppress_duplicates(boxes)]
+
+
+class ParallelEyeDetector:
+    def __init__(self, conf=None, workers=None, mode=FRAMES, tile_overlap=160, max_frame_bytes=1920 * 1080 * 3):
+        """
+        Eye detection on a pool of worker processes, each holding its own cascades, for wide and high
+        resolution shots with several visitors.
+
+        Frames are copied once into shared memory, the workers read them from there. In FRAMES mode every
+        frame goes to one worker and several frames are detected at the same time, which raises the
+        throughput. In TILES mode every frame is split into vertical strips that are detected in parallel,
+        which lowers the latency of a single frame.
+
+        :param conf: The EyeDetectionConf of the workers.
+        :param workers: Number of worker processes, the number of cores if None.
+        :param mode: FRAMES or TILES.
+        :param tile_overlap: Pixels neighbouring tiles overlap, at least the width of the largest face.
+        :param max_frame_bytes: Size of the largest frame.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.mode = mode
+        self.tile_overlap = tile_overlap
+        # a slot per frame in flight, plus the one being written
+        slots = self.workers + 2
+        self._ring = SharedFrameRing(slots=slots, max_frame_bytes=max_frame_bytes)
+        self._in_flight = threading.BoundedSemaphore(slots - 1)
+        self._write_lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(START_METHOD),
+            initializer=_init_worker,
+            initargs=(conf, self._ring.spec),
+        )
+
+    def detect(self, image, frame_id=None, min_eyes=None):
+        """
+        :return: The EyeDetectionResult of the image, waits for the workers.
+        """
+        return self.submit(image, frame_id=frame_id, min_eyes=min_eyes).result()
+
+    def submit(self, image, frame_id=None, min_eyes=None):
+        """
+        Start detecting the eyes on an image, blocks while all slots are in flight.
+
+        :return: A Future of the EyeDetectionResult, its result is None if the frame was lost.
+        """
+        started_at = time.perf_counter()
+        self._in_flight.acquire()
+        with self._write_lock:
+            sequence = self._ring.write(image)
+        tiles = [self._pool.submit(_detect, sequence, left, right, min_eyes) for left, right in self._tiles(image.shape[1])]
+
+        future = Future()
+        pending = [len(tiles)]
+        lock = threading.Lock()
+
+        def tile_done(_):
+            with lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            self._in_flight.release()
+            try:
+                future.set_result(self._combine([tile.result() for tile in tiles], frame_id, started_at))
+            except Exception as e:
+                future.set_exception(e)
+
+        for tile in tiles:
+            tile.add_done_callback(tile_done)
+        return future
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self._ring.close()
+
+    @staticmethod
+    def _combine(parts, frame_id, started_at):
+        if any(part is None for part in parts):
+            return None
+        # a whole frame has no overlap, and two overlapping eyes found on it are both real
+        merge = _merge if len(parts) > 1 else list
+        eyes = merge([eye for part in parts for eye in part[0]])
+        faces = None if parts[0][1] is None else merge([face for part in parts for face in part[1]])
+        return EyeDetectionResult(
+            [BoundingBox(*eye) for eye in eyes],
+            frame_id=frame_id,
+            processing_time=time.perf_counter() - started_at,
+            complete=all(part[2] for part in parts),
+            faces=None if faces is None else [BoundingBox(*face) for face in faces],
+        )
+
+    def _tiles(self, width):
+        if self.mode != TILES or self.workers == 1:
+            return [(0, width)]
+        tile = width // self.workers
+        return [(max(0, index * tile - self.tile_overlap // 2),
+                 width if index == self.workers - 1 else min(width, (index + 1) * tile + self.tile_overlap // 2))
+                for index in range(self.workers)]
@@ -0,0 +1,81 @@
+import collections
+import time
+
+from tracing import tracer
+
+# states of the controller
+UNCERTAIN = "uncertain"
+STABLE = "stable"
+IDLE = "idle"
+
+
+class DetectionRateController:
+    def __init__(self, max_rate=15.0, stable_rate=4.0, idle_rate=1.0, cpu_budget=0.5, stable_after=8,
+                 smoothing=0.2):
+        """
+        Decides how often the eye detection runs, instead of scanning every frame.
+
+        While the visitor's attention is uncertain or changing the detection runs at the maximum rate.
+        Once the last detections agree it slows down to the stable rate, and to the idle rate when nobody
+        is in view. A single detection that disagrees brings the rate back up right away. The rate never
+        uses more CPU than the budget.
+
+        :param max_rate: Detections per second while the attention is uncertain.
+        :param stable_rate: Detections per second while the attention does not change.
+        :param idle_rate: Detections per second while nobody is in view.
+        :param cpu_budget: Share of one core the detection may use, e.g. 0.5.
+        :param stable_after: Number of agreeing detections after which the state counts as stable.
+        :param smoothing: Weight of the newest detection in the averaged CPU time.
+        """
+        self.max_rate = max_rate
+        self.stable_rate = stable_rate
+        self.idle_rate = idle_rate
+        self.cpu_budget = cpu_budget
+        self.smoothing = smoothing
+        self.state = UNCERTAIN
+        # metrics
+        self.rate = max_rate
+        self.cpu_per_detection = 0.0
+        self.cpu_usage = 0.0
+        self.detections = 0
+        self._observations = collections.deque(maxlen=stable_after)
+        self._last_detection_at = None
+
+    def record(self, looking, present, cpu_time):
+        """
+        Update the rate with the outcome of a detection.
+
+        :param looking: True if the visitor looked at the robot.
+        :param present: True if anybody was in view.
+        :param cpu_time: CPU seconds the detection took.
+        :return: Seconds between the start of this detection and the next one.
+        """
+        now = time.perf_counter()
+        self.detections += 1
+        if self.detections == 1:
+            self.cpu_per_detection = cpu_time
+        else:
+            self.cpu_per_detection += self.smoothing * (cpu_time - self.cpu_per_detection)
+
+        self._observations.append((looking, present))
+        if len(self._observations) < self._observations.maxlen or len(set(self._observations)) > 1:
+            self.state = UNCERTAIN
+            rate = self.max_rate
+        elif not present:
+            self.state = IDLE
+            rate = self.idle_rate
+        else:
+            self.state = STABLE
+            rate = self.stable_rate
+
+        # the budget caps the rate, whatever the state
+        if self.cpu_per_detection > 0:
+            rate = min(rate, self.cpu_budget / self.cpu_per_detection)
+        self.rate = rate
+
+        if self._last_detection_at is not None:
+            elapsed = now - self._last_detection_at
+            self.cpu_usage += self.smoothing * (cpu_time / max(elapsed, 1e-6) - self.cpu_usage)
+        self._last_detection_at = now
+        tracer.counter("eye_detection.rate", rate=self.rate, cpu_usage=self.cpu_usage)
+        return 1.0 / rate
@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+
+from gaze_detection.eye_detection import EyeDetectionResult
+from sic_framework.core.message_python2 import BoundingBox
+from tracing import tracer
+
+
+class TrackingEyeDetector:
+    def __init__(self, detector, keyframe_interval=15, min_confidence=0.7, search_margin=0.5, min_tracks=2):
+        """
+        Runs the cascades only on keyframes and follows the eyes found there on the frames in between.
+
+        Every eye found on a keyframe becomes a track with the image patch of the eye as template. On the
+        next frames the template is searched only in the neighbourhood of the last position, which costs a
+        fraction of a full scan. The full detection runs again after keyframe_interval frames, or as soon as
+        one track matches worse than min_confidence, e.g. because the visitor closed their eyes or turned
+        away. A keyframe with fewer than min_tracks eyes is not tracked, the next frame is a keyframe again,
+        so a visitor who turns back is noticed on the next frame.
+
+        :param detector: The EyeDetector running the full detection.
+        :param keyframe_interval: Maximum number of frames between two full detections.
+        :param min_confidence: Lowest normalized correlation a track may match with.
+        :param search_margin: Size of the searched neighbourhood around a track, relative to the box size.
+        :param min_tracks: Lowest number of eyes on a keyframe worth tracking.
+        """
+        self.detector = detector
+        self.keyframe_interval = keyframe_interval
+        self.min_confidence = min_confidence
+        self.search_margin = search_margin
+        self.min_tracks = min_tracks
+        self.keyframes = 0
+        self.tracked_frames = 0
+        # (x, y, w, h, template) of every eye
+        self._tracks = []
+        self._since_keyframe = None
+        self._gray = None
+
+    def detect(self, image, frame_id=None, min_eyes=None):
+        """
+        Same interface as EyeDetector.detect, the result has `keyframe` set to tell how it was found. JPEG
+        bytes are decoded at full resolution, the jpeg_reduction of the detector does not apply.
+        """
+        gray = self._grayscale(image)
+        if (self._since_keyframe is not None and self._since_keyframe < self.keyframe_interval
+                and len(self._tracks) >= self.min_tracks):
+            with tracer.span("eye_detection.track", tracks=len(self._tracks)):
+                result = self._track(gray, frame_id)
+            if result is not None:
+                self._since_keyframe += 1
+                self.tracked_frames += 1
+                return result
+
+        # the grayscale frame, so the detector does not convert it again
+        result = self.detector.detect(gray, frame_id=frame_id, min_eyes=min_eyes)
+        self._tracks = [(bbox.x, bbox.y, bbox.w, bbox.h, gray[bbox.y:bbox.y + bbox.h, bbox.x:bbox.x + bbox.w].copy())
+                        for bbox in result.bboxes]
+        self._since_keyframe = 0
+        self.keyframes += 1
+        result.keyframe = True
+        return result
+
+    def are_eyes_on_image(self, image, frame_id=None):
+        return self.detect(image, frame_id=frame_id, min_eyes=2).eyes_on_image
+
+    def _track(self, gray, frame_id):
+        """
+        :return: The result with the updated tracks, None if a track was lost.
+        """
+        height, width = gray.shape
+        tracks = []
+        for x, y, w, h, template in self._tracks:
+            margin_x, margin_y = int(w * self.search_margin), int(h * self.search_margin)
+            left, top = max(0, x - margin_x), max(0, y - margin_y)
+            right, bottom = min(width, x + w + margin_x), min(height, y + h + margin_y)
+            if right - left < w or bottom - top < h:
+                return None
+            scores = cv2.matchTemplate(gray[top:bottom, left:right], template, cv2.TM_CCOEFF_NORMED)
+            _, confidence, _, (dx, dy) = cv2.minMaxLoc(scores)
+            if confidence < self.min_confidence:
+                return None
+            tracks.append((left + dx, top + dy, w, h, template))
+        self._tracks = tracks
+        result = EyeDetectionResult([BoundingBox(x, y, w, h) for x, y, w, h, _ in tracks], frame_id=frame_id)
+        result.keyframe = False
+        return result
+
+    def _grayscale(self, image):
+        if isinstance(image, (bytes, bytearray, memoryview)) or (isinstance(image, np.ndarray) and image.ndim == 1):
+            gray = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                raise ValueError("Could not decode the compressed frame")
+            return gray
+        rgb = np.asarray(image, dtype=np.uint8)
+        if rgb.ndim == 2:
+            return rgb
+        if self._gray is None or self._gray.shape != rgb.shape[:2]:
+            self._gray = np.empty(rgb.shape[:2], dtype=np.uint8)
+        cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY, dst=self._gray)
+        return self._gray
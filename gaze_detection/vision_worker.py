@@ -0,0 +1,97 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+from gaze_detection.frame_ring import RingReader, SharedFrameRing
+from latest_frame import LatestFrame
+
+# the main scripts run at import, spawn would run them again in every worker
+START_METHOD = "fork"
+
+
+def _run_worker(ring_spec, detector_factory, results, stop, min_eyes, rate_controller):
+    ring = SharedFrameRing.attach(ring_spec)
+    reader = RingReader(ring)
+    detector = detector_factory()
+    frame = image = None
+    try:
+        while not stop.is_set():
+            frame = reader.next(timeout=0.2)
+            if frame is None:
+                continue
+            sequence, timestamp, image = frame
+            started_at, cpu_started_at = time.perf_counter(), time.process_time()
+            # the detection reads the frame straight from shared memory
+            result = detector.detect(image, frame_id=sequence, min_eyes=min_eyes)
+            del image, frame
+            interval = None
+            if rate_controller is not None:
+                present = result.count > 0 or bool(result.faces)
+                interval = rate_controller.record(result.eyes_on_image, present, time.process_time() - cpu_started_at)
+                result.detection_rate = rate_controller.rate
+                result.cpu_usage = rate_controller.cpu_usage
+            # the camera wrapped around the ring while the frame was scanned, the result is unreliable
+            if ring.is_valid(sequence):
+                result.frame_timestamp = timestamp
+                result.skipped_frames = reader.skipped
+                results.put(result)
+            if interval is not None:
+                stop.wait(max(0.0, started_at + interval - time.perf_counter()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # the shared memory cannot be closed while a view of a frame exists
+        frame = image = None
+        ring.close()
+
+
+class VisionWorker:
+    def __init__(self, ring, detector_factory, min_eyes=None, rate_controller=None):
+        """
+        Runs a detector on the newest frames of a SharedFrameRing in a separate process, so the detection
+        uses another core and does not hold the GIL of the conversation loop.
+
+        :param ring: The SharedFrameRing the camera writes to.
+        :param detector_factory: Function creating the detector in the worker process, e.g.
+            functools.partial(EyeDetector, conf). The detector needs a detect(image, frame_id, min_eyes) method.
+        :param min_eyes: Passed on to detect, 2 to only answer whether the visitor looks at the robot.
+        :param rate_controller: Optional DetectionRateController deciding how often to detect, otherwise
+            every newest frame is scanned as soon as the previous scan is done.
+        """
+        context = multiprocessing.get_context(START_METHOD)
+        # results are small, only the frames stay in shared memory
+        self.results = LatestFrame()
+        # metrics reported by the rate controller in the worker
+        self.detection_rate = None
+        self.cpu_usage = None
+        self._queue = context.Queue(maxsize=16)
+        self._stop = context.Event()
+        self._process = context.Process(
+            target=_run_worker,
+            args=(ring.spec, detector_factory, self._queue, self._stop, min_eyes, rate_controller),
+            daemon=True,
+        )
+        self._forwarder = threading.Thread(target=self._forward, daemon=True)
+
+    def start(self):
+        self._process.start()
+        self._forwarder.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        self._process.join(timeout=2.0)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._forwarder.join(timeout=1.0)
+
+    def _forward(self):
+        while not self._stop.is_set():
+            try:
+                result = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            self.detection_rate = getattr(result, "detection_rate", None)
+            self.cpu_usage = getattr(result, "cpu_usage", None)
+            self.results.put((result.frame_id, result))
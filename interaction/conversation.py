@@ -0,0 +1,271 @@
+import random
+import time
+
+from nltk.tokenize import sent_tokenize
+from sic_framework.devices.common_naoqi.naoqi_leds import NaoFadeRGBRequest
+from sic_framework.devices.common_naoqi.naoqi_motion import NaoqiAnimationRequest
+from sic_framework.devices.common_naoqi.naoqi_text_to_speech import (
+    NaoqiTextToSpeechRequest,
+)
+from sic_framework.services.openai_whisper_speech_to_text.whisper_speech_to_text import (
+    GetTranscript,
+)
+
+from interaction.gestures import GestureEngine
+from interaction.memory import ConversationMemory
+from interaction.speech_pipeline import SpeechPipeline
+from interaction.streaming import StreamingReply, TurnTimer
+from tracing import tracer
+
+# with starting prompt
+CONVERSATION_START_PROMPT = {
+    "role": "system",
+    "content": (
+        "You are a social robot carrying out an experiment. You will only talk to one user at a time. "
+        "The scenario is that you are a time traveler who has visited different time periods of Amsterdam."
+        "You will receive different roles, act appropriately"
+        "Talk with an adventurous tone and use real facts of that time period to tell a story. "
+        "Always remain on topic unless the user requests to change the topic."
+        " Avoid sensitive or private information. Ask engaging questions to guide the conversation."
+        "Only ask questions at the end of your reply."
+    ),
+}
+INTRODUCTION_PROMPT = (
+    "Introduce yourself and from which time period you are from in 1 or 2 sentences."
+)
+CONTINUE_CONVERSATION_PROMPT = (
+    "Continue the conversation in the respective role."
+    "After talking for about three sentences ask an interactive question."
+)
+INTERRUPT_RESPONSE = "Oh, I understand. Let me switch to a different time period in Amsterdam."
+
+
+def break_into_sentences(text):
+    with tracer.span("split_sentences"):
+        return sent_tokenize(text)
+
+
+def era_introduction_conversations(historical_roles):
+    """
+    Build the conversation that leads to the opening monologue of every era.
+
+    :param historical_roles: The HistoricalRoles catalog.
+    :return: A list of conversations, one per era.
+    """
+    return [
+        [
+            CONVERSATION_START_PROMPT,
+            {"role": "system", "content": historical_roles.format_as_prompt(role_data)},
+            {"role": "user", "content": CONTINUE_CONVERSATION_PROMPT},
+        ]
+        for role_data in historical_roles.roles.values()
+    ]
+
+
+class Conversation:
+    def __init__(self, nao, whisper, client, historical_roles, model="gpt-4o-mini", stream_replies=True,
+                 era_cache=None, attention_lost=None, token_budget=3000, verbose_output=False):
+        """
+        The turn loop of the time-travelling robot: talk in the role of an era, listen, repeat.
+
+        :param nao: The Nao device, or anything with the same tts, motion and leds connectors.
+        :param whisper: The speech-to-text connector.
+        :param client: An OpenAI(-compatible) client.
+        :param historical_roles: The HistoricalRoles catalog to pick eras from.
+        :param model: The model used for the replies.
+        :param stream_replies: Speak the first sentence of a reply while the rest is being generated.
+        :param era_cache: Optional EraIntroductionCache with the opening monologue of every era.
+        :param attention_lost: Optional function returning True when the user stopped paying attention.
+        :param token_budget: Maximum approximate number of tokens sent per request.
+        :param verbose_output: Print what the conversation is doing.
+        """
+        self.nao = nao
+        self.whisper = whisper
+        self.client = client
+        self.historical_roles = historical_roles
+        self.model = model
+        self.stream_replies = stream_replies
+        self.era_cache = era_cache
+        self.attention_lost = attention_lost
+        self.verbose_output = verbose_output
+        self.interrupted = False
+
+        # older turns are summarized in the background to keep every request under the token budget
+        self.memory = ConversationMemory([CONVERSATION_START_PROMPT], client=client, model=model,
+                                         token_budget=token_budget)
+        # sentences are spoken by a dispatcher thread so the next one is ready when the current one ends
+        self.gestures = GestureEngine(self.play_random_animation)
+        self.speech = SpeechPipeline(
+            self.send_sentence_to_nao,
+            on_speaking_started=self.gestures.speaking_started,
+            on_speaking_stopped=self.gestures.speaking_stopped,
+        )
+
+    # Function to change NAO's eye color
+    def set_eye_color(self, color):
+        with tracer.span("leds", color=color):
+            if color == 'green':
+                self.nao.leds.request(NaoFadeRGBRequest("FaceLeds", 0, 1, 0, 0))
+            elif color == 'blue':
+                self.nao.leds.request(NaoFadeRGBRequest("FaceLeds", 0, 0, 1, 0))
+            elif color == 'off':
+                self.nao.leds.request(NaoFadeRGBRequest("FaceLeds", 0, 0, 0, 0))
+
+    # Function to play one random animation, the gesture engine repeats it while NAO is speaking
+    def play_random_animation(self):
+        animation_number = random.randint(1, 11)
+        animation_path = f"animations/Stand/Gestures/Explain_{animation_number}"
+        with tracer.span("animation", path=animation_path):
+            self.nao.motion.request(NaoqiAnimationRequest(animation_path))
+
+    # Function to send sentence to NAO's TTS, gestures are played by the gesture engine meanwhile
+    def send_sentence_to_nao(self, sentence):
+        try:
+            # Send the TTS request
+            with tracer.span("tts", text=sentence):
+                self.nao.tts.request(NaoqiTextToSpeechRequest(sentence))
+            print(f"NAO says: {sentence}")
+        except Exception as e:
+            print(f"Error sending sentence to NAO: {e}")
+
+    def add_context_to_conversation(self, content, role):
+        self.memory.append({"role": role, "content": content})
+
+    def get_gpt_response(self, text_input):
+        # the reply belongs to the era it was asked in, even if the era is switched while it is generated
+        generation = self.memory.generation
+        self.memory.append({"role": "user", "content": text_input}, generation)
+        with tracer.span("gpt", model=self.model):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=self.memory.payload(),
+            )
+        reply = response.choices[0].message.content
+        self.memory.append({"role": "assistant", "content": reply}, generation)
+        return reply
+
+    def get_gpt_response_sentences(self, text_input):
+        # a stream that ends after the era was switched must not end up in the next era
+        generation = self.memory.generation
+
+        # the first reply of every era is generated at startup
+        if self.era_cache is not None:
+            introduction = self.era_cache.get(self.memory.payload() + [{"role": "user", "content": text_input}])
+            if introduction is not None:
+                self.memory.append({"role": "user", "content": text_input}, generation)
+                self.memory.append({"role": "assistant", "content": introduction}, generation)
+                yield from break_into_sentences(introduction)
+                return
+
+        if not self.stream_replies:
+            yield from break_into_sentences(self.get_gpt_response(text_input))
+            return
+
+        # hand out sentences while the rest of the reply is still being generated
+        self.memory.append({"role": "user", "content": text_input}, generation)
+        reply = StreamingReply(self.client, self.memory.payload(), model=self.model)
+        try:
+            yield from reply
+        finally:
+            reply.close()
+            self.memory.append({"role": "assistant", "content": reply.text}, generation)
+
+    def touch_stop(self, event):
+        sensor = event.value
+        # Detect if ANY touch sensor is activated
+        touch_detection = any(sensor_info[1] for sensor_info in sensor)
+
+        if touch_detection:
+            if self.verbose_output: print("Touch detected! Stopping current speech and setting interruption flag.")
+            self.interrupted = True
+            self.speech.cancel()
+            self.nao.tts.request(NaoqiTextToSpeechRequest(INTERRUPT_RESPONSE))
+
+    def should_stop_talking(self):
+        if self.interrupted or self.attention_lost is None:
+            return self.interrupted
+        with tracer.span("gaze_check"):
+            return self.attention_lost()
+
+    def talk(self):
+        """
+        Speak the next reply sentence by sentence.
+
+        :return: False if the robot was interrupted or the user stopped paying attention.
+        """
+        turn_timer = TurnTimer()
+        self.speech.start_turn(turn_timer)
+        sentences = self.get_gpt_response_sentences(CONTINUE_CONVERSATION_PROMPT)
+        self.set_eye_color('blue')
+        for sentence in sentences:
+            self.speech.say(sentence)
+            if self.should_stop_talking():
+                self.speech.cancel()
+                break
+        sentences.close()
+        self.speech.wait_until_done()
+        self.report_talk(turn_timer)
+        return not self.should_stop_talking()
+
+    def report_talk(self, turn_timer):
+        tracer.add_complete("talk", turn_timer.started_at, time.perf_counter())
+        if turn_timer.time_to_first_speech is not None:
+            print(f"Time to first spoken word: {turn_timer.time_to_first_speech:.2f}s")
+        if self.speech.average_gap is not None:
+            print(f"Average gap between sentences: {self.speech.average_gap:.2f}s (max {self.speech.max_gap:.2f}s)")
+
+    def transcribe(self):
+        """
+        Wait for the user to say something.
+
+        :return: The transcript of what the user said.
+        """
+        with tracer.span("stt"):
+            transcript = self.whisper.request(GetTranscript(timeout=10, phrase_time_limit=30))
+        return transcript.transcript
+
+    def listen(self):
+        # always end by asking a question and then get response from user
+        print("You can talk now:")
+        self.set_eye_color('green')
+        user_input = self.transcribe()
+        self.add_context_to_conversation(user_input, "user")
+        if self.verbose_output: print("Transcript:", user_input)
+
+    def start_era(self):
+        """
+        Reset the conversation and take on the role of a random era.
+        """
+        # reset conversation
+        self.memory.reset([CONVERSATION_START_PROMPT])
+
+        # get random role
+        random_role = self.historical_roles.get_random_role()
+        role_prompt = self.historical_roles.format_as_prompt(random_role)
+        self.add_context_to_conversation(role_prompt, "system")
+
+    def run(self, num_turns, talks_per_era=None):
+        """
+        Run the conversation, every turn is spent in a different era.
+
+        :param num_turns: Number of eras to visit.
+        :param talks_per_era: Maximum number of replies per era, None to keep talking until interrupted.
+        """
+        for turn_index in range(num_turns):
+            if self.verbose_output: print(f"Turn number: {turn_index + 1}")
+            self.start_era()
+
+            # talk loop
+            talks = 0
+            while not self.interrupted and (talks_per_era is None or talks < talks_per_era):
+                if self.verbose_output: print("in talk loop")
+                talks += 1
+                if not self.talk():
+                    break
+                self.listen()
+            self.interrupted = False
+
+    def close(self):
+        self.speech.close()
+        self.gestures.close()
+        self.memory.close()
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "cache", "era_introductions.json")
+
+
+class EraIntroductionCache:
+    def __init__(self, client, model="gpt-4o-mini", cache_path=DEFAULT_CACHE_PATH, max_workers=4):
+        """
+        Cache of the opening monologue for every era, generated concurrently at startup.
+
+        Entries are keyed by a hash of the prompt and the model and stored on disk, so an era
+        switch can be answered without waiting for the LLM. Every time an entry is used a
+        fresh one is generated in the background for the next visitor.
+
+        :param client: An OpenAI(-compatible) client.
+        :param model: The model used to generate the introductions.
+        :param cache_path: Path of the JSON file the introductions are stored in.
+        :param max_workers: Number of introductions generated in parallel.
+        """
+        self.client = client
+        self.model = model
+        self.cache_path = cache_path
+        self.entries = self._load_entries()
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _load_entries(self):
+        """
+        Load the cached introductions from disk.
+
+        :return: Dictionary of cache entries by key.
+        """
+        try:
+            with open(self.cache_path, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def key(self, messages):
+        """
+        :param messages: The conversation that leads to the introduction.
+        :return: The cache key for these messages and the configured model.
+        """
+        payload = json.dumps({"model": self.model, "messages": messages}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def warm_up(self, conversations, block=True):
+        """
+        Generate the introductions that are not cached yet, all in parallel.
+
+        :param conversations: A list of conversations, one per era.
+        :param block: Wait until all introductions have been generated.
+        :return: The futures of the introductions being generated.
+        """
+        futures = [self._schedule(messages) for messages in conversations if self.key(messages) not in self.entries]
+        futures = [future for future in futures if future is not None]
+        if block:
+            wait(futures)
+        return futures
+
+    def get(self, messages):
+        """
+        Get the cached introduction for a conversation and refresh it in the background.
+
+        :param messages: The conversation that leads to the introduction.
+        :return: The introduction, or None if it is not cached.
+        """
+        entry = self.entries.get(self.key(messages))
+        if entry is None:
+            return None
+        self._schedule(messages)
+        return entry["reply"]
+
+    def close(self):
+        """
+        Wait for background refreshes to be written to disk.
+        """
+        self._executor.shutdown(wait=True)
+
+    def _schedule(self, messages):
+        key = self.key(messages)
+        with self._lock:
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+        # copy, the caller keeps appending to its conversation
+        return self._executor.submit(self._generate, key, list(messages))
+
+    def _generate(self, key, messages):
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+            )
+            reply = response.choices[0].message.content
+            with self._lock:
+                self.entries[key] = {"model": self.model, "reply": reply, "created": time.time()}
+                self._save()
+        except Exception as e:
+            print(f"Error generating era introduction: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temporary_path = self.cache_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(self.entries, file, indent=2)
+        os.replace(temporary_path, self.cache_path)
@@ -0,0 +1,60 @@
+import random
+import threading
+
+
+class GestureEngine:
+    def __init__(self, play_animation, max_pause=1.0):
+        """
+        Play gestures from one long-lived worker thread while the robot is speaking.
+
+        The speech path only signals `speaking_started` and `speaking_stopped`, it never waits
+        for an animation to finish. Once the robot is quiet no new animation is started, but an
+        animation that is already playing runs to its end: the SIC motion actuator handles one request
+        at a time and has no request to stop a running animation.
+
+        :param play_animation: Function that plays a single animation on the robot.
+        :param max_pause: Maximum pause in seconds between two animations.
+        """
+        self.play_animation = play_animation
+        self.max_pause = max_pause
+        self._speaking = threading.Event()
+        self._quiet = threading.Event()
+        self._quiet.set()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def speaking_started(self):
+        """
+        Start gesturing; returns immediately.
+        """
+        self._quiet.clear()
+        self._speaking.set()
+
+    def speaking_stopped(self):
+        """
+        Stop gesturing; no new animation is started once the robot is quiet.
+        """
+        self._speaking.clear()
+        self._quiet.set()
+
+    def close(self):
+        """
+        Stop the worker thread at the end of the session.
+        """
+        self._closed = True
+        self._speaking.set()
+        self._quiet.set()
+        self._worker.join()
+
+    def _run(self):
+        while True:
+            self._speaking.wait()
+            if self._closed:
+                return
+            try:
+                self.play_animation()
+            except Exception as e:
+                print(f"Error playing animation: {e}")
+            # pause between gestures, cut short as soon as the robot goes quiet
+            self._quiet.wait(timeout=random.random() * self.max_pause)
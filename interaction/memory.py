@@ -0,0 +1,163 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation between a time-travelling robot and a visitor below in a few sentences. "
+    "Keep names, the time period, stories that were told and questions the visitor answered."
+)
+
+
+def estimate_tokens(text):
+    """
+    Cheap approximation of the number of tokens in a text, about four characters per token.
+
+    :param text: The text to estimate.
+    :return: The approximate number of tokens.
+    """
+    return len(text) // 4 + 1
+
+
+class ConversationMemory:
+    def __init__(self, system_messages, client=None, model="gpt-4o-mini", token_budget=3000,
+                 keep_recent_messages=6):
+        """
+        Conversation history that keeps every request under a token budget.
+
+        System prompts and the most recent messages are sent verbatim. Once the conversation no longer
+        fits in the budget, older messages are folded into a rolling summary by a background worker, so
+        summarizing never delays a reply. Until the summary is ready the full history is sent.
+
+        :param system_messages: The system prompts the conversation starts with.
+        :param client: An OpenAI(-compatible) client used for summarizing, without it older
+                       messages are dropped instead.
+        :param model: The model used for summarizing.
+        :param token_budget: Maximum approximate number of tokens sent per request.
+        :param keep_recent_messages: Number of recent messages that are never summarized.
+        """
+        self.client = client
+        self.model = model
+        self.token_budget = token_budget
+        self.keep_recent_messages = keep_recent_messages
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.reset(system_messages)
+
+    def reset(self, system_messages):
+        """
+        Start a new conversation, e.g. when switching to another era.
+
+        :param system_messages: The system prompts the new conversation starts with.
+        """
+        with self._lock:
+            self.system_messages = list(system_messages)
+            self.history = []
+            self.token_counts = []
+            self.summary = ""
+            self.summarized_count = 0
+            self._generation = getattr(self, "_generation", 0) + 1
+            self._summarizing = False
+
+    @property
+    def generation(self):
+        """
+        :return: A number that changes with every reset, to tell which conversation a message belongs to.
+        """
+        return self._generation
+
+    def append(self, message, generation=None):
+        """
+        Add a message; system messages are kept verbatim, other messages may be summarized later.
+
+        :param message: A message dictionary with a role and content.
+        :param generation: The generation the message belongs to, it is dropped if the memory was reset
+                           since, e.g. a reply that finished streaming after the era was switched.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if message["role"] == "system":
+                self.system_messages.append(message)
+                return
+            self.history.append(message)
+            self.token_counts.append(estimate_tokens(message["content"]))
+        self._schedule_summary()
+
+    def payload(self):
+        """
+        Build the messages to send: system prompts, the summary and the messages it does not cover yet.
+        Without a client to summarize, only as many recent messages as fit in the budget are sent.
+
+        :return: A list of message dictionaries.
+        """
+        with self._lock:
+            messages = list(self.system_messages)
+            remaining = self.token_budget - sum(estimate_tokens(m["content"]) for m in messages)
+            if self.summary:
+                summary_message = {"role": "system", "content": f"Summary of the conversation so far:\n{self.summary}"}
+                messages.append(summary_message)
+                remaining -= estimate_tokens(summary_message["content"])
+            if self.client is not None:
+                # over the budget only until the summary that is being made is ready
+                return messages + self.history[self.summarized_count:]
+
+            # newest first, the last message is always included
+            start = len(self.history)
+            while start > self.summarized_count:
+                tokens = self.token_counts[start - 1]
+                if tokens > remaining and start < len(self.history):
+                    break
+                remaining -= tokens
+                start -= 1
+            return messages + self.history[start:]
+
+    def close(self):
+        """
+        Stop the summarizing worker.
+        """
+        self._executor.shutdown(wait=False)
+
+    def _schedule_summary(self):
+        if self.client is None:
+            return
+        with self._lock:
+            end = len(self.history) - self.keep_recent_messages
+            if self._summarizing or end <= self.summarized_count or self._payload_tokens() <= self.token_budget:
+                return
+            self._summarizing = True
+            job = (self._generation, self.summary, self.history[self.summarized_count:end], end)
+        self._executor.submit(self._summarize, *job)
+
+    def _payload_tokens(self):
+        # the caller holds the lock
+        tokens = sum(estimate_tokens(m["content"]) for m in self.system_messages)
+        if self.summary:
+            tokens += estimate_tokens(self.summary)
+        return tokens + sum(self.token_counts[self.summarized_count:])
+
+    def _summarize(self, generation, summary, messages, end):
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        if summary:
+            transcript = f"Earlier summary: {summary}\n{transcript}"
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": transcript},
+                ],
+            )
+            new_summary = response.choices[0].message.content
+        except Exception as e:
+            print(f"Error summarizing conversation: {e}")
+            new_summary = None
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._summarizing = False
+            if new_summary is not None:
+                self.summary = new_summary
+                self.summarized_count = end
+        # messages may have been added while summarizing
+        if new_summary is not None:
+            self._schedule_summary()
@@ -0,0 +1,94 @@
+import threading
+
+import httpx
+from openai import OpenAI
+
+
+class ConnectionMetrics:
+    def __init__(self):
+        """
+        Counts the HTTP requests sent to the OpenAI API and the connections opened for them.
+        """
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def reused_connections(self):
+        """
+        :return: Number of requests that were sent over an already open connection.
+        """
+        return max(0, self.requests - self.new_connections)
+
+    def count(self, attribute):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+    def __str__(self):
+        return (f"requests={self.requests} new_connections={self.new_connections} "
+                f"tls_handshakes={self.tls_handshakes} reused={self.reused_connections}")
+
+
+class _MeteredTransport(httpx.HTTPTransport):
+    def __init__(self, metrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def handle_request(self, request):
+        self.metrics.count("requests")
+        # httpcore reports connection events to this callback, they only occur for new connections
+        request.extensions["trace"] = self._trace
+        return super().handle_request(request)
+
+    def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            self.metrics.count("new_connections")
+        elif event_name == "connection.start_tls.complete":
+            self.metrics.count("tls_handshakes")
+
+
+class OpenAIClientFactory:
+    def __init__(self, api_key, base_url=None, timeout=30.0, connect_timeout=5.0, max_connections=20,
+                 max_keepalive_connections=10, keepalive_expiry=120.0, max_retries=2):
+        """
+        Creates the single OpenAI client of the process, with a pool of kept-alive connections.
+
+        httpx closes idle connections after 5 seconds by default, which is shorter than a visitor's answer,
+        so every turn paid for a new TCP and TLS handshake. Here idle connections are kept for
+        `keepalive_expiry` seconds and `warm_up` opens the first one before the first visitor arrives.
+
+        :param api_key: The OpenAI key.
+        :param base_url: Optional URL of an OpenAI-compatible API.
+        :param timeout: Seconds to wait for a response, streamed replies per chunk.
+        :param connect_timeout: Seconds to wait for a connection.
+        :param max_connections: Maximum number of simultaneous connections.
+        :param max_keepalive_connections: Maximum number of idle connections kept open.
+        :param keepalive_expiry: Seconds an idle connection is kept open.
+        :param max_retries: Number of retries of failed requests.
+        """
+        self.metrics = ConnectionMetrics()
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        http_client = httpx.Client(
+            transport=_MeteredTransport(self.metrics, limits=limits),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        )
+        self.client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=max_retries)
+
+    def warm_up(self, model="gpt-4o-mini"):
+        """
+        Resolve the host and open a connection with a cheap request, so the first turn does not pay for it.
+
+        :param model: The model to look up.
+        :return: True if the API could be reached.
+        """
+        try:
+            self.client.models.retrieve(model)
+            return True
+        except Exception as e:
+            print(f"Error warming up the OpenAI connection: {e}")
+            return False
@@ -0,0 +1,222 @@
+import asyncio
+import contextlib
+import threading
+
+from sic_framework.devices.common_naoqi.naoqi_text_to_speech import (
+    NaoqiTextToSpeechRequest,
+)
+
+from interaction.conversation import CONTINUE_CONVERSATION_PROMPT, INTERRUPT_RESPONSE
+from interaction.streaming import TurnTimer
+from tracing import tracer
+
+TALKING = "talking"
+LISTENING = "listening"
+SWITCHING_ERA = "switching_era"
+
+# reason to preempt the current state
+SWITCH_ERA = "switch_era"
+
+
+class ConversationOrchestrator:
+    def __init__(self, conversation, attention_poll_interval=0.2):
+        """
+        Event-driven version of the turn loop, an asyncio state machine on top of a Conversation.
+
+        Text generation, speech, listening and the attention check run as concurrent tasks. A head touch
+        or lost gaze preempts the current state right away, instead of after the blocking call in
+        progress has returned. The blocking robot and OpenAI calls run in
+        worker threads.
+
+        :param conversation: The Conversation providing the robot, the services and the memory.
+        :param attention_poll_interval: Seconds between two attention checks while the robot is talking.
+        """
+        self.conversation = conversation
+        self.attention_poll_interval = attention_poll_interval
+        self.state = None
+        self._loop = None
+        self._preempted = None
+        self._preempt_reason = None
+        self._pending_transcript = None
+
+    def touch_stop(self, event):
+        """
+        Button callback, switches to another era.
+        """
+        sensor = event.value
+        # Detect if ANY touch sensor is activated
+        if any(sensor_info[1] for sensor_info in sensor):
+            if self.conversation.verbose_output: print("Touch detected! Preempting and switching era.")
+            self.preempt(SWITCH_ERA)
+            self.conversation.nao.tts.request(NaoqiTextToSpeechRequest(INTERRUPT_RESPONSE))
+
+    def visitor_looked_away(self):
+        """
+        Callback for a gaze tracker: stop the story and switch to another era.
+        """
+        if self.state == TALKING:
+            self.preempt(SWITCH_ERA)
+
+    def preempt(self, reason=SWITCH_ERA):
+        """
+        Stop the current state as soon as possible; safe to call from any thread.
+
+        :param reason: SWITCH_ERA to move on to the next era.
+        """
+        if self._loop is None:
+            return
+        # stop the queued sentences right away, do not wait for the event loop
+        self.conversation.speech.cancel()
+        self._loop.call_soon_threadsafe(self._set_preempted, reason)
+
+    def _set_preempted(self, reason):
+        self._preempt_reason = reason
+        self._preempted.set()
+
+    async def run(self, num_turns, talks_per_era=None):
+        """
+        Run the conversation, every turn is spent in a different era.
+
+        :param num_turns: Number of eras to visit.
+        :param talks_per_era: Maximum number of replies per era, None to keep talking until preempted.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._preempted = asyncio.Event()
+        watcher = None
+        if self.conversation.attention_lost is not None:
+            watcher = asyncio.create_task(self._watch_attention())
+        try:
+            for turn_index in range(num_turns):
+                if self.conversation.verbose_output: print(f"Turn number: {turn_index + 1}")
+                await asyncio.to_thread(self.conversation.start_era)
+                # a preemption that arrived between two eras, e.g. during start_era, is not for the new era
+                self._preempted.clear()
+                self._preempt_reason = None
+                await self._run_era(talks_per_era)
+        finally:
+            self.state = None
+            if watcher is not None:
+                watcher.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await watcher
+            if self._pending_transcript is not None:
+                self._pending_transcript.cancel()
+
+    async def _run_era(self, talks_per_era):
+        talks = 0
+        self.state = TALKING
+        while self.state != SWITCHING_ERA:
+            if self.state == TALKING:
+                if talks_per_era is not None and talks >= talks_per_era:
+                    break
+                talks += 1
+                reason = await self._preemptible(self._talk())
+                self.state = SWITCHING_ERA if reason == SWITCH_ERA else LISTENING
+            elif self.state == LISTENING:
+                reason = await self._preemptible(self._listen())
+                self.state = SWITCHING_ERA if reason == SWITCH_ERA else TALKING
+
+    async def _preemptible(self, coroutine):
+        """
+        Run a coroutine until it finishes or the state is preempted.
+
+        :return: None if the coroutine finished, otherwise the reason it was preempted.
+        """
+        task = asyncio.create_task(coroutine)
+        preempted = asyncio.create_task(self._preempted.wait())
+        done, _ = await asyncio.wait({task, preempted}, return_when=asyncio.FIRST_COMPLETED)
+        # a coroutine that preempts itself finishes together with the preemption
+        if task in done and not self._preempted.is_set():
+            preempted.cancel()
+            task.result()
+            return None
+
+        preempted.cancel()
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        reason = self._preempt_reason
+        self._preempt_reason = None
+        self._preempted.clear()
+        return reason
+
+    async def _talk(self):
+        conversation = self.conversation
+        turn_timer = TurnTimer()
+        conversation.speech.start_turn(turn_timer)
+        sentences = asyncio.Queue()
+        cancelled = threading.Event()
+        # the producer thread owns the reply generator, so it can always close it itself
+        self._loop.run_in_executor(None, self._produce_sentences, sentences, cancelled)
+        await asyncio.to_thread(conversation.set_eye_color, 'blue')
+        try:
+            while True:
+                # the gaze tracker only reports the moment the visitor looks away, which may have been
+                # while listening, so the attention is checked again before every sentence
+                if await self._visitor_looked_away():
+                    self.preempt(SWITCH_ERA)
+                    # no further sentence, _preemptible sees the preemption once this returns
+                    await self._preempted.wait()
+                    cancelled.set()
+                    return
+                sentence = await sentences.get()
+                if sentence is None:
+                    break
+                if isinstance(sentence, Exception):
+                    # the reply failed, e.g. an OpenAI timeout, the turn fails as it would in Conversation.talk
+                    raise sentence
+                await asyncio.to_thread(conversation.speech.say, sentence)
+            await asyncio.to_thread(conversation.speech.wait_until_done)
+        except asyncio.CancelledError:
+            cancelled.set()
+            conversation.speech.cancel()
+            raise
+        finally:
+            conversation.report_talk(turn_timer)
+
+    def _produce_sentences(self, sentences, cancelled):
+        reply = self.conversation.get_gpt_response_sentences(CONTINUE_CONVERSATION_PROMPT)
+        try:
+            for sentence in reply:
+                if cancelled.is_set():
+                    break
+                self._loop.call_soon_threadsafe(sentences.put_nowait, sentence)
+        except Exception as e:
+            # raised again by _talk, nobody awaits this thread
+            self._loop.call_soon_threadsafe(sentences.put_nowait, e)
+        finally:
+            reply.close()
+            self._loop.call_soon_threadsafe(sentences.put_nowait, None)
+
+    async def _listen(self):
+        conversation = self.conversation
+        # always end by asking a question and then get response from user
+        print("You can talk now:")
+        await asyncio.to_thread(conversation.set_eye_color, 'green')
+        # a request that was abandoned by a preemption has to finish before the next one is sent
+        if self._pending_transcript is not None:
+            with contextlib.suppress(Exception):
+                await asyncio.shield(self._pending_transcript)
+        self._pending_transcript = asyncio.ensure_future(asyncio.to_thread(conversation.transcribe))
+        # shielded, a preemption only stops waiting and drops the transcript
+        user_input = await asyncio.shield(self._pending_transcript)
+        self._pending_transcript = None
+        conversation.add_context_to_conversation(user_input, "user")
+        if conversation.verbose_output: print("Transcript:", user_input)
+
+    async def _watch_attention(self):
+        while True:
+            await asyncio.sleep(self.attention_poll_interval)
+            if self.state != TALKING:
+                continue
+            if await asyncio.to_thread(self._attention_lost) and self.state == TALKING:
+                self.preempt(SWITCH_ERA)
+
+    async def _visitor_looked_away(self):
+        if self.conversation.attention_lost is None:
+            return False
+        return await asyncio.to_thread(self._attention_lost)
+
+    def _attention_lost(self):
+        with tracer.span("gaze_check"):
+            return self.conversation.attention_lost()
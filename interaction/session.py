@@ -0,0 +1,113 @@
+import asyncio
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from HistoricalRoles import HistoricalRoles
+from interaction.conversation import Conversation
+from interaction.orchestrator import ConversationOrchestrator
+
+# blocking calls a single session can have in flight: speaking, listening, generating and checking gaze
+THREADS_PER_SESSION = 6
+
+
+class SharedServices:
+    def __init__(self, client, historical_roles, whisper_factory, era_cache=None):
+        """
+        Services shared by all sessions of one process.
+
+        The OpenAI client is thread-safe and pools its connections, so every session uses the same one.
+        Whisper connectors are bound to a microphone, they are kept in a pool and reconnected to the
+        microphone of the next session instead of being created again.
+
+        :param client: An OpenAI(-compatible) client.
+        :param historical_roles: The HistoricalRoles catalog, only read by the sessions.
+        :param whisper_factory: Function creating a new Whisper connector.
+        :param era_cache: Optional EraIntroductionCache shared by all sessions.
+        """
+        self.client = client
+        self.historical_roles = historical_roles
+        self.whisper_factory = whisper_factory
+        self.era_cache = era_cache
+        self._idle_whispers = queue.LifoQueue()
+
+    def acquire_whisper(self, mic=None):
+        """
+        :param mic: The microphone to connect the Whisper connector to, None to keep its current input.
+        :return: An idle Whisper connector, a new one if none is idle.
+        """
+        try:
+            whisper = self._idle_whispers.get_nowait()
+        except queue.Empty:
+            whisper = self.whisper_factory()
+        if mic is not None:
+            whisper.connect(mic)
+        return whisper
+
+    def release_whisper(self, whisper):
+        self._idle_whispers.put(whisper)
+
+
+class Session:
+    _ids = itertools.count(1)
+    _ids_lock = threading.Lock()
+
+    def __init__(self, nao, services, mic=None, attention_lost=None, register_touch=True, **conversation_options):
+        """
+        One robot talking to one visitor; all per-visitor state lives here.
+
+        :param nao: The Nao device of this session.
+        :param services: The SharedServices of the process.
+        :param mic: The microphone of this session, e.g. nao.mic.
+        :param attention_lost: Optional function returning True when the visitor stopped paying attention.
+        :param register_touch: Switch era when the robot's head is touched.
+        :param conversation_options: Passed on to Conversation, e.g. stream_replies or verbose_output.
+        """
+        with Session._ids_lock:
+            self.session_id = next(Session._ids)
+        self.nao = nao
+        self.services = services
+        self.whisper = services.acquire_whisper(mic)
+        self.conversation = Conversation(
+            nao,
+            self.whisper,
+            services.client,
+            HistoricalRoles(roles=services.historical_roles.roles),
+            era_cache=services.era_cache,
+            attention_lost=attention_lost,
+            **conversation_options,
+        )
+        self.orchestrator = ConversationOrchestrator(self.conversation)
+        if register_touch:
+            nao.buttons.register_callback(self.orchestrator.touch_stop)
+
+    async def run(self, num_turns, talks_per_era=None):
+        """
+        :param num_turns: Number of eras to visit.
+        :param talks_per_era: Maximum number of replies per era, None to keep talking until preempted.
+        """
+        await self.orchestrator.run(num_turns, talks_per_era=talks_per_era)
+
+    def close(self):
+        self.conversation.close()
+        self.services.release_whisper(self.whisper)
+
+
+async def run_sessions(sessions, num_turns, talks_per_era=None):
+    """
+    Run several sessions concurrently in the current event loop.
+
+    :param sessions: The sessions to run.
+    :param num_turns: Number of eras every session visits.
+    :param talks_per_era: Maximum number of replies per era, None to keep talking until preempted.
+    """
+    # the blocking robot and OpenAI calls of all sessions share the default executor
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=THREADS_PER_SESSION * max(1, len(sessions)))
+    loop.set_default_executor(executor)
+    try:
+        await asyncio.gather(*(session.run(num_turns, talks_per_era) for session in sessions))
+    finally:
+        for session in sessions:
+            session.close()
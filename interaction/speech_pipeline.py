@@ -0,0 +1,154 @@
+import queue
+import threading
+import time
+from collections import deque
+
+_STOP = object()
+
+
+class SpeechPipeline:
+    def __init__(self, speak, maxsize=8, max_recorded_gaps=1000, on_speaking_started=None,
+                 on_speaking_stopped=None):
+        """
+        Keep the robot's text-to-speech fed back-to-back from a bounded sentence queue.
+
+        A dedicated dispatcher thread takes sentences off the queue and speaks them, so the
+        next sentence is already waiting while the current one is being spoken.
+
+        :param speak: Function that speaks one sentence and returns when it has been spoken.
+        :param maxsize: Maximum number of sentences waiting to be spoken.
+        :param max_recorded_gaps: Number of inter-sentence gaps of the session kept in gaps.
+        :param on_speaking_started: Optional function called when the robot starts speaking after being quiet.
+        :param on_speaking_stopped: Optional function called when no more sentences are waiting to be spoken.
+        """
+        self.speak = speak
+        self.gaps = deque(maxlen=max_recorded_gaps)
+        # the gaps since start_turn, for average_gap and max_gap
+        self.turn_gaps = []
+        self.on_speaking_started = on_speaking_started
+        self.on_speaking_stopped = on_speaking_stopped
+        self._speaking = False
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._generation = 0
+        # set by cancel, sentences are dropped until the next turn starts
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._last_finished_at = None
+        self._turn_timer = None
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def say(self, sentence):
+        """
+        Queue a sentence to be spoken; blocks while the queue is full. Dropped after cancel, until the
+        next start_turn.
+
+        :param sentence: The sentence to speak.
+        """
+        with self._lock:
+            if self._cancelled:
+                return
+            generation, turn_timer = self._generation, self._turn_timer
+        # a cancel while this waits for room in the queue bumps the generation, the dispatcher drops it
+        self._queue.put((generation, turn_timer, sentence))
+
+    def cancel(self):
+        """
+        Drop every sentence that has not been spoken yet, e.g. when the user interrupts, and every
+        sentence said until the next start_turn. The sentence that is currently being spoken is finished
+        by the robot.
+        """
+        with self._lock:
+            self._cancelled = True
+            self._generation += 1
+            self._last_finished_at = None
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+
+    def start_turn(self, turn_timer=None):
+        """
+        Start a new turn, ending a cancel. average_gap and max_gap only cover the gaps after this call.
+
+        :param turn_timer: Optional TurnTimer of the turn, marked right before the first sentence of the
+            turn is spoken, after any sentence still playing and the wait for the dispatcher.
+        """
+        with self._lock:
+            self._cancelled = False
+            self.turn_gaps = []
+            self._turn_timer = turn_timer
+
+    def wait_until_done(self):
+        """
+        Block until every queued sentence has been spoken or cancelled.
+        The silence after this point (e.g. listening to the user) is not counted as a gap.
+        """
+        self._queue.join()
+        with self._lock:
+            self._last_finished_at = None
+
+    def close(self):
+        """
+        Speak the remaining sentences and stop the dispatcher thread.
+        """
+        self._queue.put(_STOP)
+        self._dispatcher.join()
+
+    @property
+    def average_gap(self):
+        """
+        :return: The mean silence between two consecutive sentences of this turn in seconds, or None.
+        """
+        if not self.turn_gaps:
+            return None
+        return sum(self.turn_gaps) / len(self.turn_gaps)
+
+    @property
+    def max_gap(self):
+        """
+        :return: The longest silence between two consecutive sentences of this turn in seconds, or None.
+        """
+        if not self.turn_gaps:
+            return None
+        return max(self.turn_gaps)
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    self._set_speaking(False)
+                    return
+                generation, turn_timer, sentence = item
+                with self._lock:
+                    if generation != self._generation:
+                        continue
+                    if self._last_finished_at is not None:
+                        gap = time.perf_counter() - self._last_finished_at
+                        self.gaps.append(gap)
+                        self.turn_gaps.append(gap)
+                if turn_timer is not None:
+                    turn_timer.mark_first_speech()
+                self._set_speaking(True)
+                try:
+                    self.speak(sentence)
+                except Exception as e:
+                    print(f"Error speaking sentence: {e}")
+                if self._queue.empty():
+                    self._set_speaking(False)
+                with self._lock:
+                    if generation == self._generation:
+                        self._last_finished_at = time.perf_counter()
+            finally:
+                self._queue.task_done()
+
+    def _set_speaking(self, speaking):
+        if speaking == self._speaking:
+            return
+        self._speaking = speaking
+        callback = self.on_speaking_started if speaking else self.on_speaking_stopped
+        if callback is not None:
+            callback()
@@ -0,0 +1,135 @@
+import time
+
+from nltk.tokenize import sent_tokenize
+
+from tracing import tracer
+
+SENTENCE_END_CHARACTERS = ".!?"
+
+
+class SentenceStreamer:
+    def __init__(self):
+        """
+        Incrementally split a stream of text chunks into sentences.
+
+        A sentence is only released once text after its boundary has arrived, so that
+        abbreviations such as "Mr." are not cut off too early.
+        """
+        self.buffer = ""
+
+    def feed(self, chunk):
+        """
+        Add a chunk of text and return the sentences that are now complete.
+
+        :param chunk: The next piece of text from the stream.
+        :return: A list of finished sentences, possibly empty.
+        """
+        self.buffer += chunk
+        # Only the unfinished tail is kept in the buffer, so this check is cheap
+        if not any(character in self.buffer for character in SENTENCE_END_CHARACTERS):
+            return []
+
+        with tracer.span("split_sentences"):
+            sentences = sent_tokenize(self.buffer)
+        if len(sentences) < 2:
+            return []
+
+        self.buffer = self.buffer[self.buffer.rfind(sentences[-1]):]
+        return sentences[:-1]
+
+    def flush(self):
+        """
+        Return whatever is left in the buffer once the stream has ended.
+
+        :return: A list of the remaining sentences.
+        """
+        sentences = sent_tokenize(self.buffer)
+        self.buffer = ""
+        return sentences
+
+
+class StreamingReply:
+    def __init__(self, client, messages, model="gpt-4o-mini"):
+        """
+        Start a streamed chat completion and iterate over its sentences as they are generated.
+
+        The request is sent immediately, the full reply text is available as `text` once the
+        iteration has finished or the reply has been closed.
+
+        :param client: An OpenAI(-compatible) client.
+        :param messages: The conversation to send.
+        :param model: The model to use for the completion.
+        """
+        self.text = ""
+        self.started_at = time.perf_counter()
+        self.first_sentence_at = None
+        self._splitter = SentenceStreamer()
+        self._stream = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+        )
+
+    def __iter__(self):
+        for chunk in self._stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            self.text += delta
+            for sentence in self._splitter.feed(delta):
+                yield self._mark(sentence)
+
+        for sentence in self._splitter.flush():
+            yield self._mark(sentence)
+
+    def _mark(self, sentence):
+        if self.first_sentence_at is None:
+            self.first_sentence_at = time.perf_counter()
+        return sentence
+
+    @property
+    def time_to_first_sentence(self):
+        """
+        :return: Seconds between sending the request and the first complete sentence, or None.
+        """
+        if self.first_sentence_at is None:
+            return None
+        return self.first_sentence_at - self.started_at
+
+    def close(self):
+        """
+        Stop receiving tokens, e.g. when the user interrupted the robot.
+        """
+        close = getattr(self._stream, "close", None)
+        if close is not None:
+            close()
+        tracer.add_complete("gpt", self.started_at, time.perf_counter(), stream=True,
+                            time_to_first_sentence=self.time_to_first_sentence)
+
+
+class TurnTimer:
+    def __init__(self):
+        """
+        Measure the time from the start of a turn until the robot starts speaking.
+        """
+        self.started_at = time.perf_counter()
+        self.first_speech_at = None
+
+    def mark_first_speech(self):
+        """
+        Record the moment the robot is asked to speak the first sentence, i.e. its text-to-speech request
+        is sent; later calls are ignored.
+        """
+        if self.first_speech_at is None:
+            self.first_speech_at = time.perf_counter()
+
+    @property
+    def time_to_first_speech(self):
+        """
+        :return: Seconds between the start of the turn and the robot starting to speak, or None.
+        """
+        if self.first_speech_at is None:
+            return None
+        return self.first_speech_at - self.started_at
@@ -0,0 +1,87 @@
+import queue
+import threading
+import time
+
+
+class LatestFrame:
+    def __init__(self):
+        """
+        A slot holding only the newest value of a stream, e.g. camera frames or detection results.
+
+        Replaces queue.Queue(maxsize=1) in the SIC callbacks: put() never blocks, it overwrites the value
+        that was not read yet, so the callback thread never stalls on a slow consumer and consumers always
+        get the freshest frame. get() keeps the Queue interface, it returns a value newer than the one it
+        returned last and raises queue.Empty on a timeout.
+
+        Every value gets a sequence number, values that were overwritten before anyone read them are counted
+        as dropped.
+        """
+        self.puts = 0
+        self.dropped = 0
+        # (sequence number, value), replaced as a whole so latest() can read it without the lock
+        self._slot = (0, None)
+        self._taken = 0
+        self._last_get = 0
+        self._condition = threading.Condition(threading.Lock())
+
+    def put(self, value, block=True, timeout=None):
+        """
+        Store a new value, never blocks. The arguments of Queue.put are accepted and ignored.
+
+        :return: The sequence number of the value.
+        """
+        with self._condition:
+            sequence = self._slot[0] + 1
+            if self._slot[0] > self._taken:
+                self.dropped += 1
+            self._slot = (sequence, value)
+            self.puts += 1
+            self._condition.notify_all()
+        return sequence
+
+    def put_nowait(self, value):
+        return self.put(value)
+
+    def latest(self):
+        """
+        :return: The sequence number and the newest value, (0, None) before the first put.
+        """
+        return self._slot
+
+    def wait_newer(self, sequence, timeout=None):
+        """
+        Wait for a value newer than `sequence`, so several consumers can each keep their own position.
+
+        :param sequence: Sequence number of the last value the caller has seen.
+        :param timeout: Seconds to wait, None to wait forever.
+        :return: The sequence number and the value.
+        :raises queue.Empty: When no newer value arrived in time.
+        """
+        with self._condition:
+            return self._wait_newer(sequence, timeout)
+
+    def get(self, block=True, timeout=None):
+        """
+        Queue-compatible: the newest value that was not returned by get() before.
+
+        :raises queue.Empty: When no newer value arrived in time, or right away if block is False.
+        """
+        with self._condition:
+            # only the last value returned by get counts, wait_newer consumers keep their own position
+            sequence, value = self._wait_newer(self._last_get, timeout if block else 0)
+            self._last_get = sequence
+        return value
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def _wait_newer(self, sequence, timeout):
+        # called with the lock held
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._slot[0] <= sequence:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise queue.Empty
+            self._condition.wait(remaining)
+        self._taken = max(self._taken, self._slot[0])
+        return self._slot
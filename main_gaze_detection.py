@@ -1,34 +1,29 @@
+import asyncio
 import os
-import random
-import threading
-import time
 import nltk
 from dotenv import load_dotenv
-from nltk.tokenize import sent_tokenize
 from sic_framework.devices import Nao
-from sic_framework.devices.common_naoqi.naoqi_leds import NaoFadeRGBRequest
-from sic_framework.devices.common_naoqi.naoqi_motion import NaoqiAnimationRequest, NaoPostureRequest
-from sic_framework.devices.common_naoqi.naoqi_text_to_speech import (
-    NaoqiTextToSpeechRequest,
-)
-from sic_framework.services.openai_gpt.gpt import GPT, GPTConf, OpenAI
+from sic_framework.devices.common_naoqi.naoqi_motion import NaoPostureRequest
 from sic_framework.services.openai_whisper_speech_to_text.whisper_speech_to_text import (
-    GetTranscript,
     SICWhisper,
     WhisperConf,
 )
 from sic_framework.devices.desktop import Desktop
 from HistoricalRoles import HistoricalRoles
-from sic_framework.core.message_python2 import (
-    BoundingBoxesMessage,
-    CompressedImageMessage,
-)
+from interaction.conversation import Conversation, era_introduction_conversations
+from interaction.era_cache import EraIntroductionCache
+from interaction.openai_client import OpenAIClientFactory
+from interaction.orchestrator import ConversationOrchestrator
+from tracing import enable_from_environment
+from sic_framework.core.message_python2 import CompressedImageMessage
 from sic_framework.devices.common_desktop.desktop_camera import DesktopCameraConf
-from sic_framework.devices.desktop import Desktop
-from sic_framework.services.face_detection.face_detection import FaceDetection
-from custom_components.eye_detection import EyeDetection
-from gaze_detection import eye_detection
-import queue
+from gaze_detection.autotune import scaled_conf
+from gaze_detection.eye_detection import EyeDetectionConf, EyeDetector
+from gaze_detection.frame_ring import SharedFrameRing
+from gaze_detection.gaze_tracker import GazeTracker
+from gaze_detection.rate_controller import DetectionRateController
+from gaze_detection.tracking import TrackingEyeDetector
+from gaze_detection.vision_worker import VisionWorker
 
 nltk.download('punkt_tab')
 
@@ -40,155 +35,96 @@ nao_ip = os.getenv("NAO_IP")
 if not openai_key or not nao_ip:
     raise EnvironmentError("Missing environment variables in .env file.")
 
+# write a trace of every turn when TRACE_FILE is set
+enable_from_environment()
+
+# the eye detection runs in its own process on the frames in shared memory, it is started before
+# any connection is made so the forked worker inherits nothing else
+frame_ring = SharedFrameRing(slots=4)
+
+# scale of the camera frames and step of the cascade image pyramids, run gaze_detection/autotune.py on a
+# recording of the camera to find the smallest values that still find the eyes
+CAMERA_SCALE = 1.0
+CASCADE_SCALE_FACTOR = 1.1
+
+
+def create_eye_detector():
+    # only search eyes inside the faces, and follow the eyes found there between two full detections
+    conf = scaled_conf(EyeDetectionConf(face_roi=True, scale_factor=CASCADE_SCALE_FACTOR), CAMERA_SCALE)
+    return TrackingEyeDetector(EyeDetector(conf), keyframe_interval=15)
+
+
+# stop as soon as two eyes were found
+# scan fast while the attention changes, slowly while it is stable or nobody is there, with at most half a core
+eye_worker = VisionWorker(frame_ring, create_eye_detector, min_eyes=2,
+                          rate_controller=DetectionRateController(cpu_budget=0.5))
+eye_worker.start()
+
 nao = Nao(ip=nao_ip)
 nao.motion.request(NaoPostureRequest("Stand", 0.5))
 
 # Initialize devices and services
 whisper_conf = WhisperConf(openai_key=openai_key)
 whisper = SICWhisper(conf=whisper_conf)
-gpt_conf = GPTConf(openai_key=openai_key, model="gpt-4o-mini")
-gpt = GPT(conf=gpt_conf)
-client = OpenAI(api_key=openai_key)
+# one pooled client for all replies, summaries and era introductions
+openai_factory = OpenAIClientFactory(api_key=openai_key, timeout=30.0)
+client = openai_factory.client
+# open the connection now, not during the visitor's first turn
+openai_factory.warm_up("gpt-4o-mini")
 
 # connect to desktop mic
-conf = DesktopCameraConf(fx=1.0, fy=1.0, flip=1)
+conf = DesktopCameraConf(fx=CAMERA_SCALE, fy=CAMERA_SCALE, flip=1)
 desktop = Desktop(camera_conf=conf)
 whisper.connect(desktop.mic)
 
-# face detection stuff
-# Connect to the services
-eye_rec = EyeDetection()
-imgs_buffer = queue.Queue(maxsize=1)
-# Feed the camera images into the face recognition component
-eye_rec.connect(desktop.camera)
-
-
-# Function to change NAO's eye color
-def set_eye_color(color):
-    if color == 'green':
-        nao.leds.request(NaoFadeRGBRequest("FaceLeds", 0, 1, 0, 0))
-    elif color == 'blue':
-        nao.leds.request(NaoFadeRGBRequest("FaceLeds", 0, 0, 1, 0))
-    elif color == 'off':
-        nao.leds.request(NaoFadeRGBRequest("FaceLeds", 0, 0, 0, 0))
-
-
-# Function to play animations while NAO is speaking
-def play_random_animations(stop_event):
-    while not stop_event.is_set():
-        animation_number = random.randint(1, 11)
-        animation_path = f"animations/Stand/Gestures/Explain_{animation_number}"
-        nao.motion.request(NaoqiAnimationRequest(animation_path))
-        time.sleep(random.random())
-
-
-# Function to send sentence to NAO's TTS and play animations concurrently
-def send_sentence_and_animation_to_nao(sentence):
-    stop_event = threading.Event()
-    animation_thread = threading.Thread(target=play_random_animations, args=(stop_event,))
-
-    try:
-        animation_thread.start()
-        # Send the TTS request
-        nao.tts.request(NaoqiTextToSpeechRequest(sentence))
-        print(f"NAO says: {sentence}")
-
-        stop_event.set()
-        animation_thread.join()
-    except Exception as e:
-        print(f"Error sending sentence to NAO: {e}")
-    finally:
-        stop_event.set()
-        if animation_thread.is_alive():
-            animation_thread.join()
-
-
-def break_into_sentences(text):
-    return sent_tokenize(text)
-
-
-def add_context_to_conversation(content, role):
-    conversation.append({"role": role, "content": content})
-
-
-def get_gpt_response(text_input, role="user"):
-    conversation.append({"role": "user", "content": text_input})
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=conversation,
-    )
-    reply = response.choices[0].message.content
-    conversation.append({"role": "assistant", "content": reply})
-    return reply
-
 
 def on_image(image_message: CompressedImageMessage):
-    imgs_buffer.put(image_message.image)
+    # one copy into shared memory, the eye worker reads the frame from there
+    frame_ring.write(image_message.image, image_message._timestamp)
 
 
 desktop.camera.register_callback(on_image)
+# follows the results of the eye worker, the conversation never waits for the camera or the detection
+gaze_tracker = GazeTracker(eye_worker.results, lambda frame_id, result: result.eyes_on_image, grace_period=1.0)
+gaze_tracker.start()
 
 # parameters
 verbose_output = False
+STREAM_REPLIES = True
 historical_roles = HistoricalRoles()
 NUM_TURNS = 10
-interrupted = False
-i = 0
-
-# with starting prompt
-CONVERSATION_START_PROMPT = {
-    "role": "system",
-    "content": (
-        "You are a social robot carrying out an experiment. You will only talk to one user at a time. "
-        "The scenario is that you are a time traveler who has visited different time periods of Amsterdam."
-        "You will receive different roles, act appropriately"
-        "Talk with an adventurous tone and use real facts of that time period to tell a story. "
-        "Always remain on topic unless the user requests to change the topic."
-        " Avoid sensitive or private information. Ask engaging questions to guide the conversation."
-        "Only ask questions at the end of your reply."
-    ),
-}
-INTRODUCTION_PROMPT = (
-    "Introduce yourself and from which time period you are from in 1 or 2 sentences."
-)
-CONTINUE_CONVERSATION_PROMPT = (
-    "Continue the conversation in the respective role."
-    "After talking for about three sentences ask an interactive question."
-)
 
-for turn_index in range(NUM_TURNS):
-    if verbose_output: print(f"Turn number: {turn_index + 1}")
-
-    # reset conversation
-    conversation = [CONVERSATION_START_PROMPT]
-
-    # get random role
-    random_role = historical_roles.get_random_role()
-    role_prompt = historical_roles.format_as_prompt(random_role)
-    add_context_to_conversation(role_prompt, "system")
-
-    # talk loop
-    while not interrupted:
-        if verbose_output: print("in talk loop")
-        # robot talk code
-        reply = get_gpt_response(CONTINUE_CONVERSATION_PROMPT)
-        sentences = break_into_sentences(reply)
-        set_eye_color('blue')
-        for sentence in sentences:
-            send_sentence_and_animation_to_nao(sentence)
-            if not eye_rec.are_eyes_on_image(imgs_buffer.get()):
-                break
-        if not eye_rec.are_eyes_on_image(imgs_buffer.get()):
-            break
-        # always end by asking a question and then get response from user
-        print("You can talk now:")
-        set_eye_color('green')
-        transcript = whisper.request(GetTranscript(timeout=10, phrase_time_limit=30))
-        user_input = transcript.transcript
-        add_context_to_conversation(user_input, "user")
-        if verbose_output: print("Transcript:", user_input)
-    interrupted = False
+# generate the opening monologue of every era in parallel, so era switches do not wait for GPT
+era_cache = EraIntroductionCache(client, model="gpt-4o-mini")
+era_cache.warm_up(era_introduction_conversations(historical_roles))
+
+conversation = Conversation(
+    nao,
+    whisper,
+    client,
+    historical_roles,
+    model="gpt-4o-mini",
+    stream_replies=STREAM_REPLIES,
+    era_cache=era_cache,
+    # checked before every sentence, also when the visitor looked away while the robot was listening
+    attention_lost=gaze_tracker.attention_lost,
+    verbose_output=verbose_output,
+)
 
+# listening, talking and the gaze checks run concurrently
+orchestrator = ConversationOrchestrator(conversation)
+# interrupt the story as soon as the visitor looks away, even mid-sentence
+gaze_tracker.register_callback(orchestrator.visitor_looked_away)
+asyncio.run(orchestrator.run(NUM_TURNS))
+
+gaze_tracker.close()
+eye_worker.close()
+if verbose_output: print(f"Camera frames: {frame_ring.sequence}, checked: {eye_worker.results.puts}, "
+                         f"detection rate: {eye_worker.detection_rate}/s, cpu: {eye_worker.cpu_usage}")
+frame_ring.close()
+conversation.close()
+era_cache.close()
+if verbose_output: print("OpenAI connections:", openai_factory.metrics)
 print("Conversation done!")
 nao.motion.request(NaoPostureRequest("Sit", 0.5))
-set_eye_color('off')
+conversation.set_eye_color('off')
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import nltk
+from dotenv import load_dotenv
+from sic_framework.devices import Nao
+from sic_framework.devices.common_naoqi.naoqi_motion import NaoPostureRequest
+from sic_framework.services.openai_whisper_speech_to_text.whisper_speech_to_text import (
+    SICWhisper,
+    WhisperConf,
+)
+from HistoricalRoles import HistoricalRoles
+from interaction.conversation import era_introduction_conversations
+from interaction.era_cache import EraIntroductionCache
+from interaction.openai_client import OpenAIClientFactory
+from interaction.session import Session, SharedServices, run_sessions
+from tracing import enable_from_environment
+
+nltk.download('punkt_tab')
+
+# Environment Variables, NAO_IPS is a comma separated list of robots
+load_dotenv()
+openai_key = os.getenv("OPENAI_KEY")
+nao_ips = [ip.strip() for ip in os.getenv("NAO_IPS", "").split(",") if ip.strip()]
+
+if not openai_key or not nao_ips:
+    raise EnvironmentError("Missing environment variables in .env file.")
+
+# write a trace of every turn when TRACE_FILE is set
+enable_from_environment()
+
+verbose_output = False
+STREAM_REPLIES = True
+NUM_TURNS = 10
+
+# one OpenAI client, one role catalog and one era cache for all robots
+openai_factory = OpenAIClientFactory(api_key=openai_key, timeout=30.0, max_connections=10 * len(nao_ips))
+client = openai_factory.client
+openai_factory.warm_up("gpt-4o-mini")
+historical_roles = HistoricalRoles()
+era_cache = EraIntroductionCache(client, model="gpt-4o-mini")
+era_cache.warm_up(era_introduction_conversations(historical_roles))
+services = SharedServices(
+    client,
+    historical_roles,
+    whisper_factory=lambda: SICWhisper(conf=WhisperConf(openai_key=openai_key)),
+    era_cache=era_cache,
+)
+
+robots = [Nao(ip=nao_ip) for nao_ip in nao_ips]
+for nao in robots:
+    nao.motion.request(NaoPostureRequest("Stand", 0.5))
+
+# every robot listens with its own microphone
+sessions = [
+    Session(nao, services, mic=nao.mic, model="gpt-4o-mini", stream_replies=STREAM_REPLIES,
+            verbose_output=verbose_output)
+    for nao in robots
+]
+
+asyncio.run(run_sessions(sessions, NUM_TURNS))
+
+era_cache.close()
+if verbose_output: print("OpenAI connections:", openai_factory.metrics)
+print("Conversations done!")
+for session in sessions:
+    session.nao.motion.request(NaoPostureRequest("Sit", 0.5))
+    session.conversation.set_eye_color('off')
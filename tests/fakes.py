@@ -0,0 +1,69 @@
+"""
+Stand-ins for the conversation the orchestrator drives, so the turn logic can be tested without a robot.
+"""
+
+from types import SimpleNamespace
+
+
+class FakeSpeech:
+    def __init__(self):
+        self.spoken = []
+
+    def say(self, sentence):
+        self.spoken.append(sentence)
+
+    def start_turn(self, turn_timer=None):
+        pass
+
+    def cancel(self):
+        pass
+
+    def wait_until_done(self):
+        pass
+
+
+class FakeConversation:
+    def __init__(self, attention_lost=None):
+        self.attention_lost = attention_lost
+        self.verbose_output = False
+        self.speech = FakeSpeech()
+        self.eras = 0
+        self.nao = None
+
+    def start_era(self):
+        self.eras += 1
+
+    def set_eye_color(self, color):
+        pass
+
+    def report_talk(self, turn_timer):
+        pass
+
+    def get_gpt_response_sentences(self, text_input):
+        yield from ["One.", "Two.", "Three."]
+
+    def transcribe(self):
+        return "Tell me more."
+
+    def add_context_to_conversation(self, content, role):
+        pass
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeOpenAIClient:
+    def __init__(self, reply="Ah, welcome traveller! The harbour is full of ships today. What would you trade?"):
+        """
+        Stand-in for the OpenAI client, every streamed word is one chunk.
+        """
+        self.reply = reply
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, stream=False):
+        self.requests.append(messages)
+        if stream:
+            return iter([_chunk(word + " ") for word in self.reply.split()])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))])
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import FakeNao, FakeWhisper
+from HistoricalRoles import HistoricalRoles
+from interaction.conversation import CONVERSATION_START_PROMPT, Conversation
+from interaction.memory import ConversationMemory
+from interaction.orchestrator import SWITCH_ERA, ConversationOrchestrator
+from tests.fakes import FakeConversation, FakeOpenAIClient
+
+
+def test_memory_drops_messages_of_an_earlier_generation():
+    memory = ConversationMemory([CONVERSATION_START_PROMPT])
+    generation = memory.generation
+    memory.reset([CONVERSATION_START_PROMPT])
+    memory.append({"role": "assistant", "content": "A reply of the previous era."}, generation)
+    memory.append({"role": "user", "content": "Hello!"}, memory.generation)
+    assert memory.history == [{"role": "user", "content": "Hello!"}]
+
+
+def test_reply_streamed_across_an_era_switch_stays_in_its_era():
+    conversation = Conversation(FakeNao(), FakeWhisper(delay=0), FakeOpenAIClient(), HistoricalRoles())
+    try:
+        conversation.start_era()
+        sentences = conversation.get_gpt_response_sentences("Tell me a story.")
+        assert next(sentences) == "Ah, welcome traveller!"
+        # preempted, the next era starts while the producer still reads the stream
+        conversation.start_era()
+        list(sentences)
+        assert conversation.memory.history == []
+    finally:
+        conversation.close()
+
+
+def test_preemption_between_eras_does_not_skip_the_next_era():
+    conversation = FakeConversation()
+    orchestrator = ConversationOrchestrator(conversation)
+    start_era = conversation.start_era
+
+    def start_era_and_get_touched():
+        start_era()
+        if conversation.eras == 1:
+            orchestrator.preempt(SWITCH_ERA)
+
+    conversation.start_era = start_era_and_get_touched
+    asyncio.run(orchestrator.run(1, talks_per_era=1))
+    assert conversation.speech.spoken == ["One.", "Two.", "Three."]
+
+
+def test_failed_reply_fails_the_turn():
+    conversation = FakeConversation()
+
+    def reply_that_times_out(text_input):
+        yield "One."
+        raise TimeoutError("Request timed out.")
+
+    conversation.get_gpt_response_sentences = reply_that_times_out
+    with pytest.raises(TimeoutError):
+        asyncio.run(ConversationOrchestrator(conversation).run(1, talks_per_era=1))
+    assert conversation.speech.spoken == ["One."]
@@ -0,0 +1,46 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.frames import SyntheticFrames
+from gaze_detection.eye_detection import EyeDetection, EyeDetectionConf, EyeDetectionRequest, EyeDetector
+
+
+def test_in_process_reply_times_out():
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = EyeDetection._with_timeout(executor.submit(release.wait, 5), 0.05)
+        with pytest.raises(TimeoutError):
+            future.result(1)
+        release.set()
+
+
+def test_in_process_reply_in_time():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = EyeDetection._with_timeout(executor.submit(lambda: "reply"), 5)
+        assert future.result(1) == "reply"
+
+
+def test_rejects_unsupported_jpeg_reduction():
+    with pytest.raises(ValueError):
+        EyeDetectionConf(jpeg_reduction=3)
+
+
+def test_early_exit_gives_the_answer_of_a_full_scan():
+    detector = EyeDetector(EyeDetectionConf())
+    for image, _ in SyntheticFrames(seed=0).frames(40):
+        assert detector.detect(image, min_eyes=2).eyes_on_image == detector.detect(image).eyes_on_image
+
+
+def test_in_process_connector_needs_no_redis():
+    eye_detection = EyeDetection(conf=EyeDetectionConf(face_roi=True), in_process=True)
+    try:
+        images = [image for image, _ in SyntheticFrames(seed=0).frames(3)]
+        detector = EyeDetector(EyeDetectionConf(face_roi=True))
+        expected = [detector.detect(image).count for image in images]
+        assert eye_detection.request(EyeDetectionRequest(images[0])).count == expected[0]
+        assert eye_detection.request_async(EyeDetectionRequest(images[1])).result(5).count == expected[1]
+        assert [result.count for result in eye_detection.detect_batch(images)] == expected
+    finally:
+        eye_detection.stop()
@@ -0,0 +1,96 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+import numpy as np
+
+from gaze_detection.frame_ring import RingReader, SharedFrameRing
+from gaze_detection.vision_worker import START_METHOD, _run_worker
+
+
+def test_reads_the_frame_written():
+    ring = SharedFrameRing(slots=3, max_frame_bytes=4 * 5 * 3)
+    try:
+        frame = np.arange(4 * 5 * 3, dtype=np.uint8).reshape(4, 5, 3)
+        sequence = ring.write(frame, timestamp=1.5)
+        timestamp, view = ring.read(sequence)
+        assert timestamp == 1.5
+        assert np.array_equal(view, frame)
+        del view
+    finally:
+        ring.close()
+
+
+def test_overwritten_frame_is_not_returned():
+    ring = SharedFrameRing(slots=2, max_frame_bytes=16)
+    try:
+        first = ring.write(np.zeros((4, 4), dtype=np.uint8))
+        ring.write(np.ones((4, 4), dtype=np.uint8))
+        ring.write(np.full((4, 4), 2, dtype=np.uint8))
+        assert ring.read(first) is None
+        assert not ring.is_valid(first)
+    finally:
+        ring.close()
+
+
+def test_reader_gets_the_newest_frame():
+    ring = SharedFrameRing(slots=4, max_frame_bytes=16)
+    try:
+        reader = RingReader(ring)
+        for value in range(3):
+            ring.write(np.full((4, 4), value, dtype=np.uint8))
+        sequence, _, view = reader.next(timeout=0.1)
+        assert sequence == 3 and view[0, 0] == 2
+        assert reader.skipped == 2
+        del view
+        assert reader.next(timeout=0.01) is None
+    finally:
+        ring.close()
+
+
+class InterruptedDetector:
+    def detect(self, image, frame_id=None, min_eyes=None):
+        raise KeyboardInterrupt
+
+
+def test_worker_interrupted_during_a_detection_closes_the_ring():
+    ring = SharedFrameRing(slots=2, max_frame_bytes=16)
+    try:
+        def detector_factory():
+            # the worker is attached by now and waits for this frame
+            ring.write(np.zeros((4, 4), dtype=np.uint8))
+            return InterruptedDetector()
+
+        _run_worker(ring.spec, detector_factory, queue.Queue(), threading.Event(), None, None)
+    finally:
+        ring.close()
+
+
+def _read_next(ring_spec, ready, frames):
+    ring = SharedFrameRing.attach(ring_spec)
+    reader = RingReader(ring)
+    ready.set()
+    frame = reader.next(timeout=5.0)
+    frames.put(None if frame is None else (frame[0], int(frame[2][0, 0])))
+    frame = None
+    ring.close()
+
+
+def test_reader_in_another_process_wakes_up_on_a_write():
+    context = multiprocessing.get_context(START_METHOD)
+    ring = SharedFrameRing(slots=2, max_frame_bytes=16)
+    ready, frames = context.Event(), context.Queue()
+    reader = context.Process(target=_read_next, args=(ring.spec, ready, frames))
+    reader.start()
+    try:
+        # the reader only gets frames written after it attached
+        assert ready.wait(5.0)
+        time.sleep(0.05)
+        written_at = time.monotonic()
+        ring.write(np.full((4, 4), 7, dtype=np.uint8))
+        assert frames.get(timeout=5.0) == (1, 7)
+        assert time.monotonic() - written_at < 1.0
+    finally:
+        reader.join(timeout=5.0)
+        ring.close()
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+
+from gaze_detection.gaze_tracker import GazeTracker
+from interaction.orchestrator import ConversationOrchestrator
+from latest_frame import LatestFrame
+from tests.fakes import FakeConversation
+
+
+def test_talks_while_the_visitor_looks():
+    conversation = FakeConversation(attention_lost=lambda: False)
+    asyncio.run(ConversationOrchestrator(conversation).run(2, talks_per_era=2))
+    assert len(conversation.speech.spoken) == 12
+
+
+def test_stops_talking_when_the_visitor_looked_away_while_listening():
+    looking = threading.Event()
+    looking.set()
+    conversation = FakeConversation(attention_lost=lambda: not looking.is_set())
+    # the visitor looks away while the robot listens to the first answer
+    transcribe = conversation.transcribe
+
+    def look_away_and_transcribe():
+        looking.clear()
+        return transcribe()
+
+    conversation.transcribe = look_away_and_transcribe
+    asyncio.run(ConversationOrchestrator(conversation).run(3, talks_per_era=3))
+    # only the first talk of the first era, every later talk stops before its first sentence
+    assert conversation.speech.spoken == ["One.", "Two.", "Three."]
+    assert conversation.eras == 3
+
+
+def test_slow_detection_does_not_count_as_looking_away():
+    frames = LatestFrame()
+    tracker = GazeTracker(frames, lambda frame_id, looking: looking, away_frames=1, grace_period=0.0,
+                          frame_timeout=0.02, missed_frames=10).start()
+    try:
+        # a result every 0.1 seconds, five times slower than frame_timeout
+        for frame_id in range(5):
+            frames.put((frame_id, True))
+            time.sleep(0.1)
+        assert tracker.is_looking()
+    finally:
+        tracker.close()
+
+
+def test_no_frames_count_as_looking_away():
+    tracker = GazeTracker(LatestFrame(), lambda frame_id, looking: looking, away_frames=1, grace_period=0.0,
+                          frame_timeout=0.01, missed_frames=3).start()
+    try:
+        deadline = time.perf_counter() + 2.0
+        while tracker.is_looking() and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert not tracker.is_looking()
+    finally:
+        tracker.close()
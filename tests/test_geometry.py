@@ -0,0 +1,29 @@
+import numpy as np
+
+from gaze_detection.geometry import assign_eyes, containment, eyes_per_face, iou, suppress_duplicates
+from sic_framework.core.message_python2 import BoundingBox
+
+
+def test_eye_goes_to_the_smallest_face_containing_it():
+    # a visitor standing in front of a larger face in the background
+    faces = [(0, 0, 400, 400), (100, 100, 100, 100)]
+    eyes = [(120, 120, 20, 20), (160, 120, 20, 20), (10, 10, 20, 20), (500, 500, 20, 20)]
+    assert assign_eyes(faces, eyes).tolist() == [1, 1, 0, -1]
+    assert eyes_per_face(faces, eyes).tolist() == [1, 2]
+
+
+def test_accepts_bounding_boxes_and_no_faces():
+    eyes = [BoundingBox(120, 120, 20, 20)]
+    assert assign_eyes([BoundingBox(100, 100, 100, 100)], eyes).tolist() == [0]
+    assert assign_eyes([], eyes).tolist() == [-1]
+    assert eyes_per_face([], eyes).tolist() == []
+
+
+def test_eye_on_the_edge_of_a_face_is_not_inside_it():
+    assert containment([(0, 0, 100, 100)], [(90, 10, 20, 20)]).tolist() == [[False]]
+
+
+def test_iou_and_duplicates():
+    boxes = [(0, 0, 10, 10), (0, 0, 10, 10), (5, 0, 10, 10), (100, 100, 4, 4)]
+    assert np.isclose(iou(boxes[:1], boxes[2:3])[0, 0], 50 / 150)
+    assert sorted(suppress_duplicates(boxes).tolist()) == [0, 3]
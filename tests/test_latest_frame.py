@@ -0,0 +1,41 @@
+import queue
+import threading
+
+import pytest
+
+from latest_frame import LatestFrame
+
+
+def test_put_overwrites_the_unread_value():
+    frames = LatestFrame()
+    frames.put("first")
+    frames.put("second")
+    assert frames.get_nowait() == "second"
+    assert frames.puts == 2 and frames.dropped == 1
+
+
+def test_get_returns_every_value_once():
+    frames = LatestFrame()
+    frames.put("frame")
+    assert frames.get_nowait() == "frame"
+    with pytest.raises(queue.Empty):
+        frames.get_nowait()
+    with pytest.raises(queue.Empty):
+        frames.get(timeout=0.01)
+
+
+def test_consumers_keep_their_own_position():
+    frames = LatestFrame()
+    sequence = frames.put("first")
+    assert frames.get_nowait() == "first"
+    assert frames.latest() == (sequence, "first")
+    frames.put("second")
+    assert frames.wait_newer(sequence, timeout=0.01)[1] == "second"
+    # wait_newer does not move the position of get
+    assert frames.get_nowait() == "second"
+
+
+def test_get_waits_for_a_put():
+    frames = LatestFrame()
+    threading.Timer(0.02, frames.put, ("frame",)).start()
+    assert frames.get(timeout=1.0) == "frame"
@@ -0,0 +1,84 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from interaction.memory import ConversationMemory, estimate_tokens
+
+SYSTEM = {"role": "system", "content": "You are a time-travelling robot."}
+
+
+class SummarizingClient:
+    def __init__(self, summary="The visitor asked about ships."):
+        """
+        Stand-in for the OpenAI client, a summary is only returned once `release` is set.
+        """
+        self.summary = summary
+        self.requests = 0
+        self.release = threading.Event()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages):
+        self.requests += 1
+        self.release.wait(5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.summary))])
+
+
+def message(index, words=20):
+    return {"role": "user" if index % 2 else "assistant", "content": " ".join([f"word{index}"] * words)}
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 40) == 11
+
+
+def test_no_summary_while_the_conversation_fits():
+    client = SummarizingClient()
+    memory = ConversationMemory([SYSTEM], client=client, token_budget=10000, keep_recent_messages=2)
+    try:
+        for index in range(20):
+            memory.append(message(index))
+        assert client.requests == 0
+        assert memory.payload() == [SYSTEM] + memory.history
+    finally:
+        memory.close()
+
+
+def test_full_history_is_sent_until_the_summary_is_ready():
+    client = SummarizingClient()
+    memory = ConversationMemory([SYSTEM], client=client, token_budget=200, keep_recent_messages=2)
+    try:
+        for index in range(10):
+            memory.append(message(index))
+        assert wait_for(lambda: client.requests == 1)
+        # nothing is dropped while the summary is being made
+        assert memory.payload() == [SYSTEM] + memory.history
+
+        client.release.set()
+        assert wait_for(lambda: memory.summary == client.summary)
+        payload = memory.payload()
+        assert payload[0] == SYSTEM
+        assert client.summary in payload[1]["content"]
+        assert payload[2:] == memory.history[memory.summarized_count:]
+        assert payload[-2:] == memory.history[-2:]
+    finally:
+        client.release.set()
+        memory.close()
+
+
+def test_without_a_client_only_recent_messages_within_the_budget_are_sent():
+    memory = ConversationMemory([SYSTEM], token_budget=100, keep_recent_messages=2)
+    for index in range(10):
+        memory.append(message(index))
+    payload = memory.payload()
+    assert payload[0] == SYSTEM
+    assert payload[-1] == memory.history[-1]
+    assert sum(estimate_tokens(m["content"]) for m in payload) <= 100
+    assert len(payload) < 11
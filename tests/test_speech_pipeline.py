@@ -0,0 +1,59 @@
+import time
+
+from interaction.speech_pipeline import SpeechPipeline
+from interaction.streaming import TurnTimer
+
+
+def speak_turn(speech, sentences, pause):
+    speech.start_turn()
+    for sentence in sentences:
+        speech.say(sentence)
+    speech.wait_until_done()
+    time.sleep(pause)
+
+
+def test_gaps_are_reported_per_turn():
+    speech = SpeechPipeline(lambda sentence: time.sleep(0.01))
+    try:
+        speak_turn(speech, ["One.", "Two.", "Three."], 0.05)
+        assert len(speech.turn_gaps) == 2
+        speak_turn(speech, ["Four."], 0.0)
+        # a single sentence has no gap, and the silence between the turns is not one either
+        assert speech.average_gap is None and speech.max_gap is None
+        assert len(speech.gaps) == 2
+    finally:
+        speech.close()
+
+
+def test_sentences_said_after_cancel_are_dropped_until_the_next_turn():
+    spoken = []
+    speech = SpeechPipeline(spoken.append)
+    try:
+        speech.start_turn()
+        speech.say("One.")
+        speech.wait_until_done()
+        # the interrupt arrives before the talk loop has seen it
+        speech.cancel()
+        speech.say("Two.")
+        speech.wait_until_done()
+        speech.start_turn()
+        speech.say("Three.")
+        speech.wait_until_done()
+        assert spoken == ["One.", "Three."]
+    finally:
+        speech.close()
+
+
+def test_first_speech_is_marked_when_the_robot_starts_speaking():
+    speech = SpeechPipeline(lambda sentence: time.sleep(0.05))
+    try:
+        # a sentence of the previous turn is still being spoken
+        speech.say("Still talking.")
+        turn_timer = TurnTimer()
+        speech.start_turn(turn_timer)
+        speech.say("One.")
+        assert turn_timer.time_to_first_speech is None
+        speech.wait_until_done()
+        assert turn_timer.time_to_first_speech >= 0.03
+    finally:
+        speech.close()
@@ -0,0 +1,26 @@
+from interaction.streaming import SentenceStreamer
+
+
+def stream(chunks):
+    streamer = SentenceStreamer()
+    released = [streamer.feed(chunk) for chunk in chunks]
+    return released, streamer.flush()
+
+
+def test_sentences_are_released_once_the_next_one_starts():
+    released, rest = stream(["Hello the", "re. How are", " you? I am fine"])
+    assert released == [[], ["Hello there."], ["How are you?"]]
+    assert rest == ["I am fine"]
+
+
+def test_abbreviation_does_not_end_a_sentence():
+    released, rest = stream(["Mr.", " Smith arrived", " in 1850. He stayed."])
+    assert sum(released, []) == ["Mr. Smith arrived in 1850."]
+    assert rest == ["He stayed."]
+
+
+def test_flush_empties_the_buffer():
+    streamer = SentenceStreamer()
+    streamer.feed("No end")
+    assert streamer.flush() == ["No end"]
+    assert streamer.flush() == []
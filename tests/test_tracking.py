@@ -0,0 +1,30 @@
+import cv2
+
+from benchmarks.frames import moving_face_video
+from gaze_detection.eye_detection import EyeDetectionConf, EyeDetector
+from gaze_detection.tracking import TrackingEyeDetector
+
+
+def test_tracks_between_keyframes():
+    tracker = TrackingEyeDetector(EyeDetector(EyeDetectionConf(face_roi=True)), keyframe_interval=5)
+    video = moving_face_video(10, look_away_every=1000)
+    results = [tracker.detect(image, frame_id=index) for index, (image, _) in enumerate(video)]
+    assert all(result.eyes_on_image for result in results)
+    assert results[0].keyframe and not results[1].keyframe
+    assert tracker.keyframes == 2
+
+
+def test_accepts_jpeg_bytes():
+    tracker = TrackingEyeDetector(EyeDetector(EyeDetectionConf(face_roi=True)))
+    image, _ = moving_face_video(1)[0]
+    _, jpeg = cv2.imencode(".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    assert tracker.detect(jpeg.tobytes()).eyes_on_image
+
+
+def test_detects_again_after_a_keyframe_without_both_eyes():
+    tracker = TrackingEyeDetector(EyeDetector(EyeDetectionConf(face_roi=True)), keyframe_interval=15)
+    # the visitor looks away on the first frames and back afterwards
+    video = moving_face_video(12, look_away_every=6, look_away_frames=3)
+    results = [tracker.detect(image, frame_id=index) for index, (image, _) in enumerate(video)]
+    for (_, looking), result in zip(video, results):
+        assert result.eyes_on_image == looking
@@ -0,0 +1,146 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+# perf_counter is precise but has no fixed origin, shift it to wall clock time so traces of
+# different processes (e.g. the eye detection component) line up
+_EPOCH_OFFSET = time.time() - time.perf_counter()
+
+
+def _timestamp_us(perf_time):
+    return (perf_time + _EPOCH_OFFSET) * 1e6
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.add_complete(self.name, self.started_at, time.perf_counter(), **self.args)
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        """
+        Collects timed spans and writes them in the Chrome trace format, which can be opened in
+        chrome://tracing or https://ui.perfetto.dev. Disabled until `enable` is called, spans are then
+        a shared no-op.
+        """
+        self.enabled = False
+        self.path = None
+        self.events = []
+        self._thread_names = {}
+
+    def enable(self, path):
+        """
+        Start recording spans; they are written to the given file when the process exits.
+
+        :param path: Path of the JSON trace file.
+        """
+        self.path = path
+        self.enabled = True
+        atexit.register(self.write)
+
+    def span(self, name, **args):
+        """
+        Time a block of code: `with tracer.span("tts", text=sentence): ...`
+
+        :param name: Name of the span.
+        :param args: Extra information shown with the span.
+        :return: A context manager.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def add_complete(self, name, started_at, ended_at, **args):
+        """
+        Record a span that was timed by the caller, e.g. one that covers several generator steps.
+
+        :param name: Name of the span.
+        :param started_at: Start time from time.perf_counter().
+        :param ended_at: End time from time.perf_counter().
+        :param args: Extra information shown with the span.
+        """
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        self._thread_names.setdefault(thread.ident, thread.name)
+        # list.append is atomic, spans from all threads go into the same list without a lock
+        self.events.append({
+            "name": name,
+            "ph": "X",
+            "ts": _timestamp_us(started_at),
+            "dur": (ended_at - started_at) * 1e6,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": args,
+        })
+
+    def counter(self, name, **values):
+        """
+        Record the current value of one or more metrics, shown as a graph over time.
+
+        :param name: Name of the counter.
+        :param values: The metrics, e.g. rate=5.0.
+        """
+        if not self.enabled:
+            return
+        self.events.append({
+            "name": name,
+            "ph": "C",
+            "ts": _timestamp_us(time.perf_counter()),
+            "pid": os.getpid(),
+            "args": values,
+        })
+
+    def write(self, path=None):
+        """
+        Write the recorded spans to the trace file.
+
+        :param path: Optional path overriding the one given to `enable`.
+        """
+        path = path or self.path
+        if path is None:
+            return
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": ident, "args": {"name": name}}
+            for ident, name in self._thread_names.items()
+        ]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}, file)
+
+
+tracer = Tracer()
+
+
+def enable_from_environment(suffix=""):
+    """
+    Enable the tracer if TRACE_FILE is set, e.g. TRACE_FILE=trace.json in the .env file.
+
+    :param suffix: Added to the file name, so that several processes do not overwrite each other's trace.
+    """
+    path = os.getenv("TRACE_FILE")
+    if path:
+        root, extension = os.path.splitext(path)
+        tracer.enable(f"{root}{suffix}{extension or '.json'}")